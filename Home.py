@@ -11,7 +11,7 @@ import os
 
 # Now safe to import other modules
 sys.path.append(os.path.dirname(__file__))
-import face_utils
+from utils import attendance_store
 from styles import LAGOS_STYLE, get_header_style, get_topbar_style, image_to_base64
 import check_requirements
 
@@ -81,78 +81,6 @@ def show_network_alert():
     For assistance, contact ICT Support at extension 5050
     """)
 
-def load_data_from_redis():
-    name = 'attendance:logs'
-    logs = face_utils.load_logs(name=name)
-    cleaned_logs = []
-    
-    for log in logs:
-        try:
-            if isinstance(log, bytes):
-                log = log.decode('utf-8')
-            log = log.strip("b'")
-            parts = log.split('@')
-            
-            # Skip malformed entries
-            if len(parts) < 4:
-                continue
-                
-            file_name_role = parts[0]
-            role = parts[1]
-            timestamp = parts[-2]  # Second last part should be timestamp
-            action = parts[-1]     # Last part is Clock_In/Clock_Out
-            
-            # Skip if timestamp is actually an action (malformed data)
-            if timestamp in ['Clock_In', 'Clock_Out']:
-                continue
-                
-            # Handle file number and name
-            if '.' in file_name_role:
-                file_no, name = file_name_role.split('.', 1)
-            else:
-                file_no = ''
-                name = file_name_role
-                
-            # Handle zone (default to Lagos Zone 2 if not specified)
-            zone = 'Lagos Zone 2'
-            if len(parts) == 5:  # New format with zone
-                zone = parts[2]
-                
-            cleaned_logs.append({
-                'File No.': file_no,
-                'Name': name,
-                'Role': role,
-                'Zone': zone,
-                'Timestamp': timestamp,
-                'Clock_In_Out': action
-            })
-            
-        except Exception as e:
-            print(f"Error processing log entry: {log}. Error: {str(e)}")
-            continue
-
-    if not cleaned_logs:
-        return pd.DataFrame()
-
-    df = pd.DataFrame(cleaned_logs)
-    
-    # Convert timestamp with error handling
-    try:
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce')
-        # Remove rows where timestamp couldn't be parsed
-        df = df.dropna(subset=['Timestamp'])
-    except Exception as e:
-        print(f"Error converting timestamps: {str(e)}")
-        return pd.DataFrame()
-    
-    # Create derived datetime fields
-    df['Date'] = df['Timestamp'].dt.date
-    df['Time'] = df['Timestamp'].dt.time
-    df['Hour'] = df['Timestamp'].dt.hour
-    df['Day'] = df['Timestamp'].dt.day_name()
-    
-    return df
-
 def main():
     # Always show the header
     display_header()
@@ -163,11 +91,10 @@ def main():
         show_network_alert()
         st.stop()
 
-    # Rest of the application for authorized users
-    with st.spinner('Loading attendance data from Redis...'):
-        df = load_data_from_redis()
-
-    if df.empty:
+    # Rest of the application for authorized users; charts read the per-day
+    # counters, never the raw events
+    min_date, max_date = attendance_store.attendance_date_bounds()
+    if min_date is None:
         st.warning("No attendance data found in Redis database")
         st.stop()
 
@@ -176,8 +103,21 @@ def main():
     # Sidebar filters
     st.sidebar.header('Filter Options')
     
-    # Zone filter (add this first)
-    available_zones = ['All Zones'] + sorted(df['Zone'].unique().tolist())
+    date_range = st.sidebar.date_input(
+        'Select Date Range',
+        value=[min_date, max_date],
+        min_value=min_date,
+        max_value=max_date,
+        help="Select date range for analysis"
+    )
+    dates = list(date_range) if date_range else [min_date, max_date]
+    date_range = [dates[0], dates[-1]]
+
+    with st.spinner('Loading attendance data from Redis...'):
+        counts, staff = attendance_store.load_attendance_aggregates(date_range[0], date_range[1])
+    
+    # Zone filter
+    available_zones = ['All Zones'] + sorted(counts['Zone'].unique().tolist())
     selected_zone = st.sidebar.selectbox(
         'Select Zone',
         options=available_zones,
@@ -186,9 +126,9 @@ def main():
     )
     
     # Role filter (modified to work with zone filter)
-    role_options = df['Role'].unique()
+    role_options = counts['Role'].unique()
     if selected_zone != 'All Zones':
-        role_options = df[df['Zone'] == selected_zone]['Role'].unique()
+        role_options = counts[counts['Zone'] == selected_zone]['Role'].unique()
     
     selected_roles = st.sidebar.multiselect(
         'Select Roles', 
@@ -196,38 +136,28 @@ def main():
         default=role_options,
         help="Filter by staff roles"
     )
-    
-    date_range = st.sidebar.date_input(
-        'Select Date Range',
-        value=[df['Date'].min(), df['Date'].max()],
-        min_value=df['Date'].min(),
-        max_value=df['Date'].max(),
-        help="Select date range for analysis"
-    )
 
     # Filter data
-    filtered_df = df[
-        (df['Role'].isin(selected_roles)) & 
-        (df['Date'] >= date_range[0]) & 
-        (df['Date'] <= date_range[1])
-    ]
+    filtered_counts = counts[counts['Role'].isin(selected_roles)]
+    filtered_staff = staff[staff['Role'].isin(selected_roles)]
     
     # Apply zone filter if not 'All Zones'
     if selected_zone != 'All Zones':
-        filtered_df = filtered_df[filtered_df['Zone'] == selected_zone]
+        filtered_counts = filtered_counts[filtered_counts['Zone'] == selected_zone]
+        filtered_staff = filtered_staff[filtered_staff['Zone'] == selected_zone]
     
     st.write(f"Displaying data from {date_range[0]} to {date_range[1]}")
 
     # Metrics row - updated to 4 columns
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Records", len(filtered_df))
+        st.metric("Total Records", int(filtered_counts['Count'].sum()))
     with col2:
-        st.metric("Unique Employees", filtered_df['Name'].nunique())
+        st.metric("Unique Employees", filtered_staff['Name'].nunique())
     with col3:
-        st.metric("Date Range", f"{filtered_df['Date'].min()} to {filtered_df['Date'].max()}")
+        st.metric("Date Range", f"{filtered_counts['Date'].min()} to {filtered_counts['Date'].max()}")
     with col4:
-        zones = filtered_df['Zone'].unique()
+        zones = filtered_counts['Zone'].unique()
         zone_text = ', '.join(zones) if len(zones) <= 2 else f"{len(zones)} zones"
         st.metric("Zones", zone_text)
 
@@ -236,14 +166,14 @@ def main():
 
     with tab1:
         st.subheader("Daily Attendance Activity")
-        if not filtered_df.empty:
+        if not filtered_counts.empty:
             # Include zone in grouping if multiple zones selected
             if selected_zone == 'All Zones':
                 group_cols = ['Date', 'Zone', 'Clock_In_Out']
             else:
                 group_cols = ['Date', 'Clock_In_Out']
                 
-            daily_counts = filtered_df.groupby(group_cols).size().unstack(fill_value=0)
+            daily_counts = filtered_counts.groupby(group_cols)['Count'].sum().unstack(fill_value=0)
             
             fig, ax = plt.subplots(figsize=(10, 6))
             if selected_zone == 'All Zones':
@@ -262,12 +192,13 @@ def main():
             st.pyplot(fig)
 
             st.subheader("Activity by Day of Week")
+            by_day = filtered_counts.assign(Day=pd.to_datetime(filtered_counts['Date']).dt.day_name())
             if selected_zone == 'All Zones':
                 group_cols = ['Day', 'Zone', 'Clock_In_Out']
             else:
                 group_cols = ['Day', 'Clock_In_Out']
                 
-            day_counts = filtered_df.groupby(group_cols).size().unstack(fill_value=0)
+            day_counts = by_day.groupby(group_cols)['Count'].sum().unstack(fill_value=0)
             day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
             
             fig, ax = plt.subplots(figsize=(10, 4))
@@ -292,14 +223,14 @@ def main():
 
     with tab3:
         st.subheader("Hourly Activity Trends")
-        if not filtered_df.empty:
+        if not filtered_counts.empty:
             # Add zone to the grouping if multiple zones are selected
             if selected_zone == 'All Zones':
                 group_cols = ['Zone', 'Hour', 'Clock_In_Out']
             else:
                 group_cols = ['Hour', 'Clock_In_Out']
                 
-            hourly_dist = filtered_df.groupby(group_cols).size().unstack(fill_value=0)
+            hourly_dist = filtered_counts.groupby(group_cols)['Count'].sum().unstack(fill_value=0)
             
             fig, ax = plt.subplots(figsize=(10, 4))
             if selected_zone == 'All Zones':
@@ -323,7 +254,7 @@ def main():
             else:
                 group_cols = ['Role', 'Hour']
                 
-            role_hourly = filtered_df.groupby(group_cols).size().unstack(fill_value=0)
+            role_hourly = filtered_counts.groupby(group_cols)['Count'].sum().unstack(fill_value=0)
             fig, ax = plt.subplots(figsize=(12, 6))
             sns.heatmap(role_hourly, cmap='YlOrRd', ax=ax)
             plt.title('Role Activity by Hour (Darker = More Activity)')
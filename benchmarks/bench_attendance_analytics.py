@@ -0,0 +1,95 @@
+"""
+Daily work-hours summary benchmark: a per-person groupby/apply loop vs the
+vectorized daily_work_summary from utils.attendance_analytics.
+
+Events are synthetic (alternating Clock_In/Clock_Out with some missing
+clock-outs), so no Redis server is needed.
+
+Usage:
+    python benchmarks/bench_attendance_analytics.py --events 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.attendance_analytics import daily_work_summary
+
+ZONES = ['Lagos Zone 1', 'Lagos Zone 2', 'Abuja Zone 1', 'Port Harcourt Zone', 'Kano Zone']
+ROLES = ['ICT', 'LEGAL', 'Investigation', 'Admin', 'Security']
+
+
+def make_events(n_events, n_staff=2000, seed=0):
+    """Synthetic attendance events: each staff-day is an in/out pair, ~5% without the clock-out"""
+    rng = np.random.default_rng(seed)
+    n_days = max(1, n_events // (2 * n_staff))
+    staff = np.repeat(np.arange(n_staff), n_days)
+    days = np.tile(np.arange(n_days), n_staff)
+    base = np.datetime64('2024-01-01', 'ns') + days.astype('timedelta64[D]')
+    clock_in = base + rng.integers(7 * 3600, 10 * 3600, staff.size).astype('timedelta64[s]')
+    clock_out = base + rng.integers(15 * 3600, 19 * 3600, staff.size).astype('timedelta64[s]')
+    has_out = rng.random(staff.size) > 0.05
+
+    events = pd.DataFrame({
+        'File No.': np.concatenate([staff, staff[has_out]]).astype(str),
+        'Timestamp': np.concatenate([clock_in, clock_out[has_out]]),
+        'Clock_In_Out': ['Clock_In'] * staff.size + ['Clock_Out'] * int(has_out.sum()),
+    })
+    codes = events['File No.'].astype(int)
+    events['Name'] = 'First' + events['File No.'] + '.Last'
+    events['Role'] = np.asarray(ROLES)[codes % len(ROLES)]
+    events['Zone'] = np.asarray(ZONES)[codes % len(ZONES)]
+    return events.sample(frac=1.0, random_state=seed, ignore_index=True)
+
+
+def loop_summary(events):
+    """Per-person loop: groupby(staff, day).apply pairing each group's events"""
+    def summarise(group):
+        group = group.sort_values('Timestamp')
+        worked = pd.Timedelta(0)
+        last_in = None
+        for timestamp, action in zip(group['Timestamp'], group['Clock_In_Out']):
+            if action == 'Clock_In':
+                last_in = timestamp
+            elif last_in is not None:
+                worked += timestamp - last_in
+                last_in = None
+        return pd.Series({'Worked_Hours': worked.total_seconds() / 3600, 'Missing_Clock_Out': last_in is not None})
+
+    return events.groupby(['File No.', events['Timestamp'].dt.date]).apply(summarise)
+
+
+def best_of(func, arg, repeat):
+    """Best wall-clock time of `repeat` runs, in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--loop-limit', type=int, default=100000, help='Skip the loop baseline above this size')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'events':>9} {'loop ms':>12} {'vectorized ms':>15} {'speed-up':>10}")
+    for n_events in args.events:
+        events = make_events(n_events)
+        vectorized_ms = best_of(daily_work_summary, events, args.repeat)
+        if len(events) <= args.loop_limit:
+            loop_ms = best_of(loop_summary, events, 1)
+            print(f"{len(events):>9} {loop_ms:>12.1f} {vectorized_ms:>15.1f} {loop_ms / vectorized_ms:>9.1f}x")
+        else:
+            print(f"{len(events):>9} {'-':>12} {vectorized_ms:>15.1f} {'-':>10}")
+
+
+if __name__ == '__main__':
+    main()
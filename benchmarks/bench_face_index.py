@@ -0,0 +1,77 @@
+"""
+Recall-vs-latency benchmark of the face index backends against brute force.
+
+Builds a synthetic gallery of unit-length 512-d embeddings and queries it
+with noisy copies of gallery rows (as a live camera embedding would be).
+
+Usage:
+    python benchmarks/bench_face_index.py --sizes 5000 20000 50000 --queries 500
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.face_index import build_index
+
+
+def make_gallery(n_rows, dim=512, seed=0):
+    """Random unit embeddings, roughly as spread out as real identities"""
+    rng = np.random.default_rng(seed)
+    gallery = rng.standard_normal((n_rows, dim)).astype(np.float32)
+    return gallery / np.linalg.norm(gallery, axis=1, keepdims=True)
+
+
+def make_queries(gallery, n_queries, noise=0.9, seed=1):
+    """Noisy copies of random gallery rows; returns (queries, true_rows)"""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(gallery.shape[0], size=n_queries)
+    queries = gallery[rows] + noise * rng.standard_normal((n_queries, gallery.shape[1])).astype(np.float32) / np.sqrt(gallery.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True), rows
+
+
+def run(backend, params, gallery, queries, exact):
+    """Build an index, query it one face at a time and report recall@1 and latency"""
+    start = time.perf_counter()
+    try:
+        index = build_index(backend, gallery, **params)
+    except ImportError as e:
+        print(f"  {backend:<6} skipped: {e}")
+        return
+    build_seconds = time.perf_counter() - start
+
+    found = np.empty(queries.shape[0], dtype=np.int64)
+    start = time.perf_counter()
+    for i, query in enumerate(queries):
+        found[i] = index.search(query[None, :], k=1)[0][0, 0]
+    per_query_ms = (time.perf_counter() - start) * 1000 / queries.shape[0]
+
+    recall = float(np.mean(found == exact))
+    label = ' '.join(f"{k}={v}" for k, v in params.items())
+    print(f"  {backend:<6} {label:<24} recall@1={recall:.3f}  query={per_query_ms:.3f} ms  build={build_seconds:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    for n_rows in args.sizes:
+        gallery = make_gallery(n_rows)
+        queries, _ = make_queries(gallery, args.queries)
+        exact = np.argmax(queries @ gallery.T, axis=1)
+
+        print(f"N = {n_rows}")
+        run('brute', {}, gallery, queries, exact)
+        for n_probe in (4, 8, 16):
+            run('ivf', {'n_probe': n_probe}, gallery, queries, exact)
+        for ef_search in (32, 64, 128):
+            run('hnsw', {'ef_search': ef_search}, gallery, queries, exact)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Staff register load-time benchmark: legacy iterrows parser vs the
+vectorized parse_staff_register used by face_utils.retrive_data.
+
+Parsing is timed on synthetic HGETALL output, so no Redis server is needed.
+
+Usage:
+    python benchmarks/bench_retrive_data.py --sizes 1000 10000 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.staff_register import parse_staff_register
+
+ZONES = ['Lagos Zone 1', 'Lagos Zone 2', 'Abuja Zone 1', 'Port Harcourt Zone', 'Kano Zone']
+ROLES = ['ICT', 'LEGAL', 'Investigation', 'Admin', 'Security']
+
+
+def make_register(n_staff, seed=0):
+    """Synthetic HGETALL result: bytes keys -> float32 embedding bytes"""
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((n_staff, 512)).astype(np.float32)
+    return {
+        f"{1000 + i}.First{i}.Last{i}@{ROLES[i % len(ROLES)]}@{ZONES[i % len(ZONES)]}".encode(): embeddings[i].tobytes()
+        for i in range(n_staff)
+    }
+
+
+def legacy_parse(retrive_dict):
+    """The previous retrive_data body (iterrows + .at[] + Series.apply)"""
+    retrive_series = pd.Series(retrive_dict)
+    retrive_series = retrive_series.apply(lambda x: np.frombuffer(x, dtype=np.float32))
+    retrive_series.index = list(map(lambda x: x.decode(), retrive_series.index))
+    retrive_df = retrive_series.to_frame().reset_index()
+    retrive_df.columns = ['ID_Name_Role', 'Facial_features']
+    retrive_df['File No. Name'] = ''
+    retrive_df['Role'] = ''
+    retrive_df['Zone'] = 'Lagos Zone 2'
+
+    for i, row in retrive_df.iterrows():
+        parts = row['ID_Name_Role'].split('@')
+        file_no, name = parts[0].split('.', 1)
+        retrive_df.at[i, 'File No. Name'] = f"{file_no}.{name}"
+        retrive_df.at[i, 'Role'] = parts[1] if len(parts) > 1 else ''
+        retrive_df.at[i, 'Zone'] = parts[2] if len(parts) > 2 else 'Lagos Zone 2'
+
+    return retrive_df
+
+
+def best_of(func, arg, repeat):
+    """Best wall-clock time of `repeat` runs, in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'staff':>8} {'legacy ms':>12} {'vectorized ms':>15} {'speed-up':>10}")
+    for n_staff in args.sizes:
+        register = make_register(n_staff)
+        legacy_ms = best_of(legacy_parse, register, args.repeat)
+        vectorized_ms = best_of(parse_staff_register, register, args.repeat)
+        print(f"{n_staff:>8} {legacy_ms:>12.1f} {vectorized_ms:>15.1f} {legacy_ms / vectorized_ms:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
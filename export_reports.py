@@ -0,0 +1,78 @@
+"""
+Export attendance, daily work hours, staff movement or duty reports from
+Redis to CSV, gzip-compressed CSV or Parquet, streaming rows in chunks so
+memory stays flat however much history is exported. Suitable for a nightly
+cron job:
+
+    python export_reports.py attendance --yesterday --format csv.gz --output-dir /srv/exports
+
+Redis settings come from .streamlit/secrets.toml or the REDIS_* environment
+variables. Parquet output needs pyarrow.
+
+Usage:
+    python export_reports.py attendance --start 2024-05-01 --end 2024-05-31 --zone "Kano Zone"
+    python export_reports.py work_hours --start 2024-05-01 --end 2024-05-31 --late-after 08:30
+    python export_reports.py movement --format parquet
+"""
+import argparse
+import os
+from datetime import date, datetime, timedelta
+
+import face_utils
+from utils import attendance_store
+from utils.attendance_analytics import summarise_chunks
+from utils.config import get_setting
+from utils.export import EXPORT_FORMATS, export_chunks
+
+
+def make_chunks(args):
+    """DataFrame chunks of the requested report"""
+    if args.report in ('attendance', 'work_hours'):
+        chunks = attendance_store.iter_attendance(start=args.start, end=args.end, zones=args.zone or None,
+                                            staff=args.staff or None, chunk_size=args.chunk_size)
+        if args.report == 'work_hours':
+            return summarise_chunks(chunks, late_after=args.late_after, leave_before=args.leave_before)
+        return chunks
+    if args.report == 'movement':
+        return face_utils.iter_movement_logs(chunk_size=args.chunk_size)
+    return face_utils.iter_duty_reports(chunk_size=args.chunk_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('report', choices=['attendance', 'work_hours', 'movement', 'duty'])
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv')
+    parser.add_argument('--start', type=date.fromisoformat, help='First day (attendance and work hours)')
+    parser.add_argument('--end', type=date.fromisoformat, help='Last day (attendance and work hours)')
+    parser.add_argument('--yesterday', action='store_true', help='Export only yesterday (attendance and work hours)')
+    parser.add_argument('--zone', action='append', help='Zone to include, repeatable (attendance and work hours)')
+    parser.add_argument('--staff', action='append', help='File number to include, repeatable (attendance and work hours)')
+    parser.add_argument('--late-after', default=get_setting('LATE_AFTER', '09:00'), help='Work hours: late after HH:MM')
+    parser.add_argument('--leave-before', default=get_setting('LEAVE_BEFORE', '17:00'), help='Work hours: early before HH:MM')
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--output', help='Output file (default: <report>_<date><suffix> in --output-dir)')
+    args = parser.parse_args()
+
+    if args.yesterday:
+        args.start = args.end = date.today() - timedelta(days=1)
+
+    output = args.output
+    if output is None:
+        stamp = args.start.strftime('%Y%m%d') if args.yesterday else datetime.now().strftime('%Y%m%d')
+        output = os.path.join(args.output_dir, f"{args.report}_{stamp}{EXPORT_FORMATS[args.format][1]}")
+
+    # Write to a temporary name so a failed run never leaves a partial export behind
+    partial = f"{output}.partial"
+    try:
+        with open(partial, 'wb') as fileobj:
+            rows = export_chunks(make_chunks(args), args.format, fileobj)
+        os.replace(partial, output)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    print(f"Exported {rows} {args.report} rows to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,32 +1,290 @@
 import numpy as np
 import pandas as pd
-import redis
 import cv2
 import re
-import insightface
-from insightface.app import FaceAnalysis
-from sklearn.metrics import pairwise
-from sklearn.metrics.pairwise import cosine_similarity
 from datetime import datetime
+import collections
+import itertools
+import logging
 import os
+import threading
+import time
+import uuid
+
+from utils.attendance_store import ACTION_DUPLICATE, record_clock_events
+from utils.config import get_setting
+from utils.embedding_buffer import EmbeddingBuffer, RunningMeanBuffer
+from utils.enrollment import build_template, sample_quality
+from utils.face_index import build_index
+from utils.redis_store import get_redis, hgetall_many, run_script, scan_keys
+from utils.staff_register import DEFAULT_ZONE, parse_staff_register
+from utils.tracker import IoUTracker
 
-# Connect to Redis Client
 import streamlit as st
 
-# Redis connection configuration from Streamlit secrets
-hostname = st.secrets["REDIS_HOST"]  # If using Streamlit
-portnumber = st.secrets["REDIS_PORT"]
-password = st.secrets["REDIS_PASSWORD"]
+logger = logging.getLogger(__name__)
+
+# The face analysis model is created on first use, once per process, so pages
+# that never touch it (reports) import this module fast
+_faceapp = None
+_faceapp_lock = threading.Lock()
+
+def build_session_options():
+    """
+    Build ONNX Runtime session options from secrets/environment settings.
+    
+    Settings (all optional):
+        ORT_INTRA_OP_THREADS (int): Threads used inside an operator (0 = runtime default)
+        ORT_INTER_OP_THREADS (int): Threads used across operators in parallel mode
+        ORT_GRAPH_OPTIMIZATION (str): 'disable', 'basic', 'extended' or 'all' (default)
+        ORT_EXECUTION_MODE (str): 'sequential' (default) or 'parallel'
+        ORT_ENABLE_CPU_MEM_ARENA (bool): Use the CPU memory arena allocator (default true)
+        ORT_ENABLE_MEM_PATTERN (bool): Pre-plan memory for fixed input shapes (default true)
+        
+    Returns:
+        onnxruntime.SessionOptions: Options applied to every face model session
+    """
+    import onnxruntime as ort
+    
+    as_bool = lambda value: str(value).lower() in ('1', 'true', 'yes', 'on')
+    optimization_levels = {
+        'disable': ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        'basic': ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        'extended': ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        'all': ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }
+    execution_modes = {
+        'sequential': ort.ExecutionMode.ORT_SEQUENTIAL,
+        'parallel': ort.ExecutionMode.ORT_PARALLEL,
+    }
+    
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = get_setting('ORT_INTRA_OP_THREADS', 0, int)
+    options.inter_op_num_threads = get_setting('ORT_INTER_OP_THREADS', 0, int)
+    options.graph_optimization_level = optimization_levels[str(get_setting('ORT_GRAPH_OPTIMIZATION', 'all')).lower()]
+    options.execution_mode = execution_modes[str(get_setting('ORT_EXECUTION_MODE', 'sequential')).lower()]
+    options.enable_cpu_mem_arena = get_setting('ORT_ENABLE_CPU_MEM_ARENA', True, as_bool)
+    options.enable_mem_pattern = get_setting('ORT_ENABLE_MEM_PATTERN', True, as_bool)
+    return options
+
+def _warm_up(app, det_size):
+    """
+    Run each model once on a blank input and log the effective settings and latency.
+    
+    Args:
+        app (FaceAnalysis): Prepared model whose sessions should be warmed up
+        det_size (tuple): Detector input size
+        
+    Returns:
+        dict: Mapping of task name -> warm-up latency in milliseconds
+    """
+    latencies = {}
+    for taskname, model in app.models.items():
+        start = time.perf_counter()
+        if taskname == 'detection':
+            model.detect(np.zeros((det_size[1], det_size[0], 3), dtype=np.uint8), input_size=det_size)
+        elif taskname == 'recognition':
+            model.get_feat([np.zeros((112, 112, 3), dtype=np.uint8)])
+        else:
+            continue
+        latencies[taskname] = (time.perf_counter() - start) * 1000
+    
+    options = app.models['detection'].session.get_session_options()
+    logger.info(
+        "Face model sessions: intra_op_threads=%s inter_op_threads=%s graph_optimization=%s "
+        "execution_mode=%s cpu_mem_arena=%s mem_pattern=%s",
+        options.intra_op_num_threads, options.inter_op_num_threads, options.graph_optimization_level,
+        options.execution_mode, options.enable_cpu_mem_arena, options.enable_mem_pattern
+    )
+    for taskname, latency in latencies.items():
+        logger.info("Face model warm-up: %s %.1f ms", taskname, latency)
+    return latencies
+
+def get_faceapp():
+    """
+    Return the process-wide buffalo_sc FaceAnalysis model, loading it on first use.
+    
+    Every model session is recreated with the options from build_session_options
+    and warmed up once; the effective settings and latencies are logged.
+    
+    Returns:
+        insightface.app.FaceAnalysis: Prepared face detection/recognition model
+    """
+    global _faceapp
+    if _faceapp is None:
+        with _faceapp_lock:
+            if _faceapp is None:
+                import onnxruntime as ort
+                from insightface.app import FaceAnalysis
+                
+                providers = ['CPUExecutionProvider']
+                options = build_session_options()
+                
+                # Configure face analysis model
+                app = FaceAnalysis(name='buffalo_sc',
+                                   root='insightface_model',
+                                   providers=providers)
+                
+                # FaceAnalysis (insightface 0.7) only forwards providers to its
+                # sessions, so the detector and recognizer sessions are rebuilt
+                # with the tuned options. Each model is therefore loaded twice,
+                # but only once per process on first use. That is accepted so the
+                # app does not have to copy FaceAnalysis's model discovery.
+                for model in app.models.values():
+                    model.session = ort.InferenceSession(model.model_file, sess_options=options, providers=providers)
+                
+                app.prepare(ctx_id=0, det_size=(640, 640), det_thresh=0.5)
+                _warm_up(app, det_size=(640, 640))
+                _faceapp = app
+    return _faceapp
+
+
+# Detector input sizes per profile; kiosks can trade accuracy on small/distant
+# faces for speed, registration keeps the full 640x640
+DETECTOR_PROFILES = {
+    'fast': (320, 320),
+    'balanced': (480, 480),
+    'quality': (640, 640),
+}
+
+def detect_faces(image, profile='quality', downscale=1.0, embed=True):
+    """
+    Detect faces and compute their embeddings, like FaceAnalysis.get but with a
+    selectable detector size and optional frame downscaling.
+    
+    Detection runs on the (optionally downscaled) frame; boxes and landmarks are
+    mapped back to full resolution, and embeddings are taken from the full frame.
+    
+    Args:
+        image (np.array): BGR input frame
+        profile (str): Detector profile, one of DETECTOR_PROFILES
+        downscale (float): Factor (0-1] applied to the frame before detection
+        embed (bool): Compute embeddings now; pass False to do it later with embed_faces
+        
+    Returns:
+        list: insightface Face objects with 'bbox', 'kps', 'det_score' and 'embedding'
+    """
+    from insightface.app.common import Face
+    
+    app = get_faceapp()
+    small = image
+    if downscale < 1.0:
+        small = cv2.resize(image, None, fx=downscale, fy=downscale, interpolation=cv2.INTER_AREA)
+    
+    bboxes, kpss = app.det_model.detect(small, input_size=DETECTOR_PROFILES[profile], max_num=0, metric='default')
+    if bboxes.shape[0] == 0:
+        return []
+    
+    if downscale < 1.0:
+        bboxes[:, :4] /= downscale
+        if kpss is not None:
+            kpss = kpss / downscale
+    
+    faces = [Face(bbox=bboxes[i, 0:4], kps=kpss[i] if kpss is not None else None, det_score=bboxes[i, 4])
+             for i in range(bboxes.shape[0])]
+    if embed:
+        embed_faces(image, faces)
+    return faces
+
+def embed_faces(image, faces):
+    """
+    Run the non-detection models (recognition) on already detected faces.
+    
+    Args:
+        image (np.array): Full-resolution BGR frame the faces were detected in
+        faces (list): Face objects from detect_faces; updated in place
+    """
+    app = get_faceapp()
+    for face in faces:
+        for taskname, model in app.models.items():
+            if taskname != 'detection':
+                model.get(image, face)
+
 
-# Initialize Redis connection
-r = redis.StrictRedis(host=hostname, port=portnumber, password=password)
+def __getattr__(name):
+    """Keep `face_utils.r` and `face_utils.faceapp` working, lazily"""
+    if name == 'r':
+        return get_redis()
+    if name == 'faceapp':
+        return get_faceapp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def retrive_data(name):
+# Zones staff can be registered in (stored as the last part of the staff key)
+ZONES = ['Lagos Zone 1', 'Lagos Zone 2', 'Abuja Zone 1', 'Port Harcourt Zone', 'Kano Zone']
+
+def staff_zone_key(name, zone):
+    """Redis set indexing the staff register keys of one zone"""
+    return f'{name}:zone:{zone}'
+
+def rebuild_staff_zone_index(name='staff:register'):
+    """
+    Index every staff register key under its zone (keys without a zone go to DEFAULT_ZONE).
+    
+    Writes through register_staff/remove_staff keep the index current, so
+    this only runs once per register (or after keys were changed directly).
+    Members are only ever added here; stale ones are dropped on load.
+    
+    Args:
+        name (str): Redis hash holding the staff register
+        
+    Returns:
+        int: Number of keys indexed
+    """
+    r = get_redis()
+    by_zone = collections.defaultdict(list)
+    for key in r.hkeys(name):
+        key_str = key.decode('utf-8')
+        by_zone[key_str.split('@')[2] if key_str.count('@') >= 2 else DEFAULT_ZONE].append(key)
+    
+    pipe = r.pipeline(transaction=False)
+    for zone, keys in by_zone.items():
+        for start in range(0, len(keys), 1000):
+            pipe.sadd(staff_zone_key(name, zone), *keys[start:start + 1000])
+    pipe.set(f'{name}:zone_indexed', 1)
+    pipe.execute()
+    return sum(len(keys) for keys in by_zone.values())
+
+def load_staff_register(name, zone=None):
+    """
+    Fetch and parse the staff register without building per-row feature objects.
+    
+    Args:
+        name (str): The Redis hash key to retrieve data from (e.g., 'staff:register')
+        zone (str): If given, only fetch staff of this zone through its key index
+            (staff keys without a zone belong to DEFAULT_ZONE)
+            
+    Returns:
+        tuple: (labels_df, embeddings, malformed) as returned by parse_staff_register
+    """
+    r = get_redis()
+    if zone is None:
+        return parse_staff_register(r.hgetall(name))
+    
+    if not r.exists(f'{name}:zone_indexed'):
+        rebuild_staff_zone_index(name)
+    zone_key = staff_zone_key(name, zone)
+    keys = list(r.smembers(zone_key))
+    retrive_dict, stale = {}, []
+    for start in range(0, len(keys), 1000):
+        batch = keys[start:start + 1000]
+        for key, value in zip(batch, r.hmget(name, batch)):
+            if value is None:
+                stale.append(key)
+            else:
+                retrive_dict[key] = value
+    if stale:
+        r.srem(zone_key, *stale)
+    return parse_staff_register(retrive_dict)
+
+def retrive_data(name, zone=None, return_malformed=False):
     """
     Retrieve facial recognition data from Redis database and format it into a DataFrame.
     
     Args:
         name (str): The Redis hash key to retrieve data from (e.g., 'staff:register')
+        zone (str): If given, only fetch staff whose key ends with this zone
+            (legacy keys without a zone must be migrated with migrate_redis_data)
+        return_malformed (bool): Also return the entries that could not be parsed
         
     Returns:
         pd.DataFrame: A DataFrame containing staff information with columns:
@@ -35,46 +293,16 @@ def retrive_data(name):
             - Role: Staff role/position
             - Facial_features: Extracted facial embeddings
             - Zone: Geographic zone (defaults to 'Lagos Zone 2')
+        If return_malformed is True, a tuple (DataFrame, malformed) where malformed
+        is a list of {'key': ..., 'reason': ...} dicts.
     """
-    retrive_dict = r.hgetall(name)
-    retrive_series = pd.Series(retrive_dict)
-    retrive_series = retrive_series.apply(lambda x: np.frombuffer(x, dtype=np.float32))
-    index = retrive_series.index
-    index = list(map(lambda x: x.decode(), index))
-    retrive_series.index = index
-    retrive_df = retrive_series.to_frame().reset_index()
-    retrive_df.columns = ['ID_Name_Role', 'Facial_features']
-    
-    # Initialize default values
-    retrive_df['File No. Name'] = ''
-    retrive_df['Role'] = ''
-    retrive_df['Zone'] = 'Lagos Zone 2'  # Default zone
-    
-    # Process each record safely
-    for i, row in retrive_df.iterrows():
-        try:
-            parts = row['ID_Name_Role'].split('@')
-            
-            # Extract file no and name (first part before @)
-            file_name_role = parts[0]
-            file_no, name = file_name_role.split('.', 1)
-            
-            # Extract role (second part)
-            role = parts[1] if len(parts) > 1 else ''
-            
-            # Extract zone if available (third part in new format)
-            zone = parts[2] if len(parts) > 2 else 'Lagos Zone 2'
-            
-            # Update the row
-            retrive_df.at[i, 'File No. Name'] = f"{file_no}.{name}"
-            retrive_df.at[i, 'Role'] = role
-            retrive_df.at[i, 'Zone'] = zone
-            
-        except Exception as e:
-            print(f"Error processing record {row['ID_Name_Role']}: {str(e)}")
-            continue
+    retrive_df, embeddings, malformed = load_staff_register(name, zone=zone)
+    retrive_df['Facial_features'] = list(embeddings)
+    retrive_df = retrive_df[['ID_Name_Role', 'File No. Name', 'Role', 'Facial_features', 'Zone']]
     
-    return retrive_df[['ID_Name_Role', 'File No. Name', 'Role', 'Facial_features', 'Zone']]
+    if return_malformed:
+        return retrive_df, malformed
+    return retrive_df
 
 def load_logs(name, end=-1):
     """
@@ -87,58 +315,794 @@ def load_logs(name, end=-1):
     Returns:
         list: List of log entries (bytes objects that need decoding)
     """
-    logs_list = r.lrange(name, start=0, end=end)
+    logs_list = get_redis().lrange(name, start=0, end=end)
     return logs_list
 
-# Configure face analysis model
-faceapp = FaceAnalysis(name='buffalo_sc',
-                     root='insightface_model',
-                     providers=['CPUExecutionProvider'])
-faceapp.prepare(ctx_id=0, det_size=(640, 640), det_thresh=0.5)
+MOVEMENT_LOGS_KEY = 'staff:movement:logs'
+MOVEMENT_COLUMNS = ['Name', 'Role', 'Timestamp', 'Movement Type', 'Purpose', 'Location', 'Note']
+MOVEMENT_TYPES = ['Clock_In', 'Clock_Out']
+DUTY_REPORT_PREFIX = 'duty_report:'
+DUTY_ROLES = ['CRO', 'Incident Duty Officer', 'Visiting Rounds Senior Officer']
+DUTY_SHIFTS = ['Morning (06:00-18:00)', 'Night (18:00-06:00)']
+
+def parse_movement_logs(logs):
+    """
+    Parse 'name@role@timestamp@type@purpose@location@note' movement entries.
+    
+    Args:
+        logs (list): Raw list entries (bytes or str)
+        
+    Returns:
+        pd.DataFrame: MOVEMENT_COLUMNS, with Timestamp as datetime; malformed entries
+            are skipped and the index keeps each row's position in `logs`
+    """
+    if not logs:
+        return pd.DataFrame(columns=MOVEMENT_COLUMNS)
+    
+    logs = pd.Series(logs, dtype=object)
+    if isinstance(logs.iloc[0], bytes):
+        logs = logs.str.decode('utf-8', errors='replace')
+    logs = logs[logs.str.count('@') == len(MOVEMENT_COLUMNS) - 1]
+    
+    df = logs.str.split('@', expand=True).reindex(columns=range(len(MOVEMENT_COLUMNS)))
+    df.columns = MOVEMENT_COLUMNS
+    df['Timestamp'] = pd.to_datetime(df['Timestamp'], format='ISO8601', errors='coerce')
+    return df
+
+def iter_movement_logs(chunk_size=5000):
+    """
+    Stream the staff movement records as DataFrame chunks with ranged LRANGEs.
+    
+    Args:
+        chunk_size (int): List entries per chunk
+        
+    Yields:
+        pd.DataFrame: Chunks as returned by parse_movement_logs
+    """
+    r = get_redis()
+    for start in range(0, r.llen(MOVEMENT_LOGS_KEY), chunk_size):
+        df = parse_movement_logs(r.lrange(MOVEMENT_LOGS_KEY, start, start + chunk_size - 1))
+        if not df.empty:
+            yield df
+
+def page_movement_logs(cursor=None, page_size=50, name=None, movement_type=None, day=None, scan_size=1000):
+    """
+    Read one page of filtered movement records, newest first, with ranged LRANGEs.
+    
+    New records are LPUSHed, so the cursor counts the unread entries from the
+    tail of the list; it stays valid while records are added during paging.
+    
+    Args:
+        cursor (int): Cursor returned for the previous page, None for the first page
+        page_size (int): Records per page
+        name (str): Case-insensitive substring of the staff name to keep
+        movement_type (str): Movement type to keep
+        day (date): Only keep records of this day
+        scan_size (int): List entries fetched per round trip
+        
+    Returns:
+        tuple: (page_df, next_cursor) where next_cursor is None on the last page
+    """
+    r = get_redis()
+    remaining = r.llen(MOVEMENT_LOGS_KEY) if cursor is None else cursor
+    pages = []
+    found = 0
+    while remaining > 0 and found < page_size:
+        size = min(scan_size, remaining)
+        df = parse_movement_logs(r.lrange(MOVEMENT_LOGS_KEY, -remaining, -remaining + size - 1))
+        consumed = size
+        oldest = df['Timestamp'].min() if not df.empty else None
+        
+        if name:
+            df = df[df['Name'].str.contains(name, case=False, regex=False)]
+        if movement_type:
+            df = df[df['Movement Type'] == movement_type]
+        if day is not None:
+            df = df[df['Timestamp'].dt.date == day]
+        
+        if found + len(df) > page_size:
+            df = df.iloc[:page_size - found]
+            consumed = int(df.index[-1]) + 1
+        pages.append(df)
+        found += len(df)
+        remaining -= consumed
+        
+        # Records are newest first: nothing further down can be on `day`
+        if day is not None and consumed == size and pd.notna(oldest) and oldest.date() < day:
+            remaining = 0
+    
+    page = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame(columns=MOVEMENT_COLUMNS)
+    return page, remaining if remaining > 0 else None
+
+def iter_duty_reports(chunk_size=5000):
+    """
+    Stream the duty reports as DataFrame chunks, scanning and fetching the
+    report hashes `chunk_size` keys at a time.
+    
+    Args:
+        chunk_size (int): Reports per chunk
+        
+    Yields:
+        pd.DataFrame: One row per report with its hash fields as columns
+    """
+    keys = get_redis().scan_iter(match=f"{DUTY_REPORT_PREFIX}*", count=chunk_size)
+    while True:
+        batch = list(itertools.islice(keys, chunk_size))
+        if not batch:
+            return
+        yield pd.DataFrame([{k.decode('utf-8'): v.decode('utf-8') for k, v in report.items()}
+                            for report in hgetall_many(batch)])
+
+def page_duty_reports(cursor=None, page_size=50, officer_role=None, duty_type=None, day=None):
+    """
+    Read one page of filtered duty reports with a SCAN cursor.
+    
+    Report keys embed their timestamp, so a day filter becomes a SCAN MATCH
+    pattern and only matching reports are fetched. SCAN returns keys in no
+    particular order: each page is sorted newest first, and may hold a few
+    more than `page_size` reports as a SCAN batch is never split.
+    
+    Args:
+        cursor (int): SCAN cursor returned for the previous page, None for the first page
+        page_size (int): Reports per page
+        officer_role (str): Officer role to keep
+        duty_type (str): Duty shift to keep
+        day (date): Only keep reports of this day
+        
+    Returns:
+        tuple: (page_df, next_cursor) where next_cursor is None on the last page
+    """
+    r = get_redis()
+    match = f"{DUTY_REPORT_PREFIX}{day.isoformat() if day is not None else ''}*"
+    cursor = cursor or 0
+    reports = []
+    while True:
+        cursor, keys = r.scan(cursor, match=match, count=page_size)
+        for report in hgetall_many(keys):
+            report = {k.decode('utf-8'): v.decode('utf-8') for k, v in report.items()}
+            if officer_role and report.get('officer_role') != officer_role:
+                continue
+            if duty_type and report.get('duty_type') != duty_type:
+                continue
+            reports.append(report)
+        if cursor == 0 or len(reports) >= page_size:
+            break
+    
+    page = pd.DataFrame(reports)
+    if not page.empty:
+        page['timestamp'] = pd.to_datetime(page['timestamp'], format='ISO8601', errors='coerce')
+        page = page.sort_values('timestamp', ascending=False, ignore_index=True)
+    return page, cursor or None
+
+# Staff register change tracking: every write bumps a version counter and
+# records "<version>|<add/remove>|<key>" in a sorted set scored by version.
+# The same script keeps the per-zone key sets ('<name>:zone:<zone>') current;
+# their names are built in Lua, so like attendance_store this needs a single
+# Redis node (Redis Cluster is not supported).
+STAFF_VERSION_KEY = 'staff:register:version'
+STAFF_CHANGES_KEY = 'staff:register:changes'
+STAFF_CHANGES_MAX = 10000
+
+_STAFF_CHANGE_LUA = """
+local op = ARGV[1]
+local max_changes = tonumber(ARGV[2])
+local zone_prefix = ARGV[3]
+local default_zone = ARGV[4]
+local changed = 0
+local step = (op == 'add') and 2 or 1
+for i = 5, #ARGV, step do
+    local key = ARGV[i]
+    local zone_key = zone_prefix .. (string.match(key, '^[^@]*@[^@]*@(.*)$') or default_zone)
+    if op == 'add' then
+        redis.call('HSET', KEYS[1], key, ARGV[i + 1])
+        redis.call('SADD', zone_key, key)
+    else
+        redis.call('SREM', zone_key, key)
+        if redis.call('HDEL', KEYS[1], key) == 0 then
+            key = nil
+        end
+    end
+    if key then
+        local version = redis.call('INCR', KEYS[2])
+        redis.call('ZADD', KEYS[3], version, version .. '|' .. op .. '|' .. key)
+        changed = changed + 1
+    end
+end
+redis.call('ZREMRANGEBYRANK', KEYS[3], 0, -(max_changes + 1))
+return changed
+"""
+
+def register_staff(key, embedding_bytes, name='staff:register'):
+    """
+    Store (or replace) a staff embedding and record the change for gallery readers.
+    
+    Args:
+        key (str): Staff key in 'file.first.last@role@zone' format
+        embedding_bytes (bytes): float32 embedding buffer
+        name (str): Redis hash holding the staff register
+        
+    Returns:
+        int: Number of keys written (1)
+    """
+    return run_script(_STAFF_CHANGE_LUA, keys=[name, f'{name}:version', f'{name}:changes'],
+                       args=['add', STAFF_CHANGES_MAX, staff_zone_key(name, ''), DEFAULT_ZONE,
+                             key, embedding_bytes])
+
+def remove_staff(keys, name='staff:register'):
+    """
+    Delete staff embeddings and record the removals for gallery readers.
+    
+    Args:
+        keys (list): Staff keys to delete
+        name (str): Redis hash holding the staff register
+        
+    Returns:
+        int: Number of keys that existed and were deleted
+    """
+    if not keys:
+        return 0
+    return run_script(_STAFF_CHANGE_LUA, keys=[name, f'{name}:version', f'{name}:changes'],
+                       args=['remove', STAFF_CHANGES_MAX, staff_zone_key(name, ''), DEFAULT_ZONE, *keys])
 
-def ml_search_algorithm(dataframe, feature_column, test_vector, name_role=['File No. Name', 'Role'], thresh=0.5):
+def clear_staff_register(name='staff:register'):
+    """
+    Delete the whole staff register; readers detect the gap and reload fully.
+    
+    Args:
+        name (str): Redis hash holding the staff register
+    """
+    zone_keys = scan_keys(staff_zone_key(name, '*'))
+    pipe = get_redis().pipeline()
+    pipe.delete(name, f'{name}:changes', f'{name}:zone_indexed', *zone_keys)
+    pipe.incr(f'{name}:version')
+    pipe.execute()
+
+
+class FaceGallery:
+    """
+    Precomputed, L2-normalized embedding matrix of registered staff for fast matching.
+    
+    Attributes:
+        embeddings (np.ndarray): Contiguous float32 matrix of shape (N, 512) with unit-length rows
+        labels (dict): Parallel label arrays (one entry per row) keyed by column name,
+            e.g. 'ID_Name_Role', 'File No. Name', 'Role', 'Zone'
+        index (object): Optional approximate nearest-neighbour index (None = exact search)
+    """
+    
+    def __init__(self, embeddings, labels, dim=512):
+        """
+        Initialize from an embedding matrix and parallel label arrays.
+        
+        Args:
+            embeddings (np.array): Array of shape (N, dim); rows are normalized here
+            labels (dict): Mapping of column name -> sequence of length N
+            dim (int): Embedding dimension (512 for buffalo_sc)
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(-1, dim)
+        norms = np.linalg.norm(embeddings, axis=1)
+        valid = norms > 0
+        
+        self.dim = dim
+        self.embeddings = np.ascontiguousarray(embeddings[valid] / norms[valid, None], dtype=np.float32)
+        self.labels = {column: np.asarray(values, dtype=object)[valid] for column, values in labels.items()}
+        self.index = None
+        self.index_config = ('brute', {})
+    
+    def __len__(self):
+        return self.embeddings.shape[0]
+    
+    @classmethod
+    def from_redis(cls, name='staff:register', zone=None):
+        """
+        Build a gallery directly from a Redis staff hash.
+        
+        Args:
+            name (str): The Redis hash key to retrieve data from
+            zone (str): If given, only load staff registered in this zone
+            
+        Returns:
+            FaceGallery: Gallery of all (or one zone's) registered staff
+        """
+        labels_df, embeddings, _ = load_staff_register(name, zone=zone)
+        return cls(embeddings, {column: labels_df[column].to_numpy() for column in labels_df.columns})
+    
+    def _normalize_query(self, test_vector):
+        """Return the query as a unit float32 vector, or None if it cannot be matched"""
+        query = np.asarray(test_vector, dtype=np.float32).ravel()
+        if query.shape[0] != self.dim:
+            return None
+        
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+        
+        return query / norm
+    
+    def match(self, test_vector):
+        """
+        Find the closest gallery entry to a single embedding.
+        
+        Args:
+            test_vector (np.array): Facial embedding to compare against
+            
+        Returns:
+            tuple: (index, score) of the best match, or (-1, 0.0) if nothing can be matched
+        """
+        query = self._normalize_query(test_vector)
+        if query is None:
+            return -1, 0.0
+        
+        indices, scores = self.match_batch(query[None, :])
+        return int(indices[0]), float(scores[0])
+    
+    def match_batch(self, test_vectors, one_to_one=False):
+        """
+        Match every face of a frame against the gallery in one matrix product.
+        
+        Args:
+            test_vectors (np.array): Facial embeddings of shape (F, 512)
+            one_to_one (bool): If True, solve an assignment so that no two faces
+                resolve to the same gallery entry
+                
+        Returns:
+            tuple: (indices, scores) arrays of length F; index is -1 where a face
+                could not be matched or was left unassigned
+        """
+        queries = np.asarray(test_vectors, dtype=np.float32).reshape(-1, self.dim)
+        n_faces = queries.shape[0]
+        indices = np.full(n_faces, -1, dtype=np.int64)
+        scores = np.zeros(n_faces, dtype=np.float32)
+        
+        norms = np.linalg.norm(queries, axis=1)
+        valid = np.flatnonzero(norms > 0)
+        if len(self) == 0 or valid.size == 0:
+            return indices, scores
+        
+        queries = queries[valid] / norms[valid, None]
+        k = min(valid.size if one_to_one else 1, len(self))
+        
+        # Restrict scoring to candidate columns: an optimal one-to-one assignment
+        # only ever uses each face's top-F entries, and an ANN index proposes them
+        if self.index is None:
+            similarity = queries @ self.embeddings.T
+            candidates = np.arange(len(self))
+            if one_to_one and k < len(self):
+                candidates = np.unique(np.argpartition(-similarity, k - 1, axis=1)[:, :k])
+                similarity = similarity[:, candidates]
+        else:
+            neighbours, _ = self.index.search(queries, k)
+            candidates = np.unique(neighbours[neighbours >= 0])
+            if candidates.size == 0:
+                return indices, scores
+            similarity = queries @ self.embeddings[candidates].T
+        
+        if not one_to_one or valid.size == 1:
+            best = np.argmax(similarity, axis=1)
+            indices[valid] = candidates[best]
+            scores[valid] = similarity[np.arange(valid.size), best]
+            return indices, scores
+        
+        from scipy.optimize import linear_sum_assignment
+        
+        rows, cols = linear_sum_assignment(similarity, maximize=True)
+        indices[valid[rows]] = candidates[cols]
+        scores[valid[rows]] = similarity[rows, cols]
+        return indices, scores
+    
+    def set_index(self, backend='brute', **params):
+        """
+        Select the nearest-neighbour backend used by match and match_batch.
+        
+        Args:
+            backend (str): 'brute' (exact matrix product), 'ivf' (k-means partitions)
+                or 'hnsw' (graph, requires hnswlib)
+            **params: Backend-specific parameters, see utils.face_index
+            
+        Returns:
+            FaceGallery: self, for chaining
+        """
+        self.index_config = (backend, params)
+        if backend == 'brute':
+            self.index = None
+        else:
+            self.index = build_index(backend, self.embeddings, **params)
+        return self
+    
+    @classmethod
+    def from_records(cls, records, dim=512):
+        """
+        Build a gallery from raw staff register entries.
+        
+        Args:
+            records (dict): Mapping of staff key -> float32 embedding bytes
+            dim (int): Expected embedding dimension
+            
+        Returns:
+            FaceGallery: Gallery of the well-formed entries
+        """
+        labels_df, embeddings, _ = parse_staff_register(records, dim=dim)
+        return cls(embeddings, {column: labels_df[column].to_numpy() for column in labels_df.columns}, dim=dim)
+    
+    def with_changes(self, added=None, removed=()):
+        """
+        Return a new gallery with added/replaced and removed staff.
+        
+        The gallery itself is left untouched so concurrent searches never see
+        embeddings and labels from different versions.
+        
+        Args:
+            added (dict): Mapping of staff key -> float32 embedding bytes
+            removed (iterable): Staff keys to drop
+            
+        Returns:
+            FaceGallery: Updated gallery (self if nothing changed)
+        """
+        added = added or {}
+        changed = list(removed) + list(added)
+        if not changed:
+            return self
+        
+        keep = ~np.isin(self.labels['ID_Name_Role'], changed)
+        new = FaceGallery.from_records(added, dim=self.dim)
+        labels = {column: np.concatenate([values[keep], new.labels[column]])
+                  for column, values in self.labels.items()}
+        
+        backend, params = self.index_config
+        return FaceGallery(np.concatenate([self.embeddings[keep], new.embeddings]), labels,
+                           dim=self.dim).set_index(backend, **params)
+    
+    def label(self, index, name_role=['File No. Name', 'Role']):
+        """
+        Look up the labels of a gallery row.
+        
+        Args:
+            index (int): Row index returned by match, or -1 for no match
+            name_role (list): Label columns to return
+            
+        Returns:
+            tuple: Values of the requested columns, 'Unknown' for each if index is -1
+        """
+        if index < 0:
+            return tuple('Unknown' for _ in name_role)
+        return tuple(self.labels[column][index] for column in name_role)
+    
+    def search(self, test_vector, name_role=['File No. Name', 'Role'], thresh=0.5):
+        """
+        Match an embedding and return the labels of the best entry above threshold.
+        
+        Args:
+            test_vector (np.array): Facial embedding to compare against
+            name_role (list): Label columns to return
+            thresh (float): Similarity threshold for positive match (0-1)
+            
+        Returns:
+            tuple: Values of the requested columns, or 'Unknown' for each if no match
+        """
+        best, score = self.match(test_vector)
+        if score < thresh:
+            best = -1
+        return self.label(best, name_role)
+
+    def search_batch(self, test_vectors, name_role=['File No. Name', 'Role'], thresh=0.5, one_to_one=False):
+        """
+        Match the faces of a frame and return their labels and scores.
+        
+        Args:
+            test_vectors (np.array): Facial embeddings of shape (F, 512)
+            name_role (list): Label columns to return
+            thresh (float): Similarity threshold for positive match (0-1)
+            one_to_one (bool): Prevent two faces resolving to the same entry
+            
+        Returns:
+            tuple: (labels, scores) where labels is a list of F tuples of the requested
+                columns ('Unknown' below threshold) and scores an array of length F
+        """
+        indices, scores = self.match_batch(test_vectors, one_to_one=one_to_one)
+        indices[scores < thresh] = -1
+        return [self.label(index, name_role) for index in indices], scores
+
+class ShardedFaceGallery:
+    """
+    Zone-partitioned galleries for a kiosk that serves one home zone.
+    
+    Shards are loaded lazily from Redis. Faces are matched against the home
+    shard first and only faces scoring below threshold fall back to the
+    other zones, one shard at a time. Fallback shards are loaded on a
+    background thread and skipped until ready, so searches (run from video
+    frame callbacks) never wait on Redis for them.
+    
+    Attributes:
+        name (str): Redis hash holding the staff register
+        home_zone (str): Zone searched first
+        zones (list): All zones that may be searched
+        fallback (bool): Whether to search other zones when the home shard misses
+        shards (dict): Loaded FaceGallery per zone
+    """
+    
+    def __init__(self, home_zone, name='staff:register', zones=None, fallback=True, index_backend='brute'):
+        """
+        Initialize with the kiosk's home zone; no data is loaded until first use.
+        
+        Args:
+            home_zone (str): Zone the kiosk is installed in
+            name (str): Redis hash holding the staff register
+            zones (list): Zones to fall back to (defaults to ZONES)
+            fallback (bool): Search other zones when the home shard has no match
+            index_backend (str): Nearest-neighbour backend for every shard
+        """
+        self.name = name
+        self.home_zone = home_zone
+        self.zones = list(zones) if zones is not None else list(ZONES)
+        self.fallback = fallback
+        self.index_backend = index_backend
+        self.shards = {}
+        self._pending = {}  # zone being loaded -> changes made meanwhile
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards.values())
+    
+    def shard(self, zone):
+        """Return the gallery of one zone, loading it on first access"""
+        if zone not in self.shards:
+            self.shards[zone] = FaceGallery.from_redis(self.name, zone=zone).set_index(self.index_backend)
+        return self.shards[zone]
+    
+    def _load_shard(self, zone):
+        try:
+            shard = FaceGallery.from_redis(self.name, zone=zone).set_index(self.index_backend)
+        except Exception:
+            logger.exception("Loading the %s gallery shard failed", zone)
+            with self._lock:
+                del self._pending[zone]
+            return
+        with self._lock:
+            # Replay changes routed while loading (re-applying one is harmless)
+            for added, removed in self._pending.pop(zone):
+                shard = shard.with_changes(added=added, removed=removed)
+            self.shards[zone] = shard
+    
+    def prefetch(self, zone):
+        """
+        Start loading a zone's shard on a background thread, if not loaded or loading.
+        
+        Returns:
+            FaceGallery: The shard if already loaded, else None
+        """
+        with self._lock:
+            if zone in self.shards:
+                return self.shards[zone]
+            if zone not in self._pending:
+                self._pending[zone] = []
+                threading.Thread(target=self._load_shard, args=(zone,), name='gallery-shard', daemon=True).start()
+        return None
+    
+    def with_changes(self, added=None, removed=()):
+        """
+        Route added/removed staff to the shards of their zones (unloaded shards are skipped,
+        shards still loading get the changes once loaded).
+        
+        Each affected shard is replaced by an updated copy, so searches in
+        progress keep a consistent view.
+        
+        Args:
+            added (dict): Mapping of staff key -> float32 embedding bytes
+            removed (iterable): Staff keys to drop
+            
+        Returns:
+            ShardedFaceGallery: self
+        """
+        added = added or {}
+        zone_of = lambda key: key.split('@')[2] if key.count('@') >= 2 else DEFAULT_ZONE
+        with self._lock:
+            for zone in list(self.shards) + list(self._pending):
+                zone_added = {key: value for key, value in added.items() if zone_of(key) == zone}
+                zone_removed = [key for key in removed if zone_of(key) == zone]
+                if zone in self._pending:
+                    self._pending[zone].append((zone_added, zone_removed))
+                else:
+                    self.shards[zone] = self.shards[zone].with_changes(added=zone_added, removed=zone_removed)
+        return self
+    
+    def search_batch(self, test_vectors, name_role=['File No. Name', 'Role'], thresh=0.5, one_to_one=False):
+        """
+        Match faces against the home shard, falling back to other zones for misses.
+        
+        Args:
+            test_vectors (np.array): Facial embeddings of shape (F, 512)
+            name_role (list): Label columns to return
+            thresh (float): Similarity threshold for positive match (0-1)
+            one_to_one (bool): Prevent two faces resolving to the same entry within a shard
+            
+        Returns:
+            tuple: (labels, scores) as for FaceGallery.search_batch
+        """
+        test_vectors = np.asarray(test_vectors, dtype=np.float32).reshape(-1, 512)
+        labels, scores = self.shard(self.home_zone).search_batch(test_vectors, name_role, thresh, one_to_one)
+        
+        if not self.fallback:
+            return labels, scores
+        
+        for zone in self.zones:
+            missed = np.flatnonzero(scores < thresh)
+            if missed.size == 0:
+                break
+            if zone == self.home_zone:
+                continue
+            shard = self.prefetch(zone)
+            if shard is None:
+                continue  # still loading; later frames will search it
+            
+            zone_labels, zone_scores = shard.search_batch(test_vectors[missed], name_role, thresh, one_to_one)
+            for face, label, score in zip(missed, zone_labels, zone_scores):
+                if score > scores[face]:
+                    labels[face], scores[face] = label, score
+        
+        return labels, scores
+
+class GalleryCache:
+    """
+    Process-wide gallery kept in sync with the staff register incrementally.
+    
+    Readers poll the register version at most every `min_interval` seconds
+    and apply only the keys added or removed since, fetched with HMGET.
+    A full reload happens only on first use or when the change log no
+    longer covers the gap (e.g. after clear_staff_register).
+    
+    After the first load, get() never touches Redis: due checks run on a
+    background thread and swap in the new gallery when done, so video
+    frame callbacks only read the current reference.
+    
+    Attributes:
+        loader (callable): Returns a freshly loaded FaceGallery or ShardedFaceGallery
+        name (str): Redis hash holding the staff register
+        min_interval (float): Minimum seconds between version checks
+        version (int): Register version the gallery reflects
+    """
+    
+    def __init__(self, loader, name='staff:register', min_interval=5.0):
+        """
+        Initialize without loading; the first get() performs the full load.
+        
+        Args:
+            loader (callable): Returns a freshly loaded gallery
+            name (str): Redis hash holding the staff register
+            min_interval (float): Minimum seconds between version checks
+        """
+        self.loader = loader
+        self.name = name
+        self.min_interval = min_interval
+        self.version = 0
+        self.gallery = None
+        self._checked_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+    
+    def _current_version(self):
+        return int(get_redis().get(f'{self.name}:version') or 0)
+    
+    def reload(self):
+        """Load the whole register (the version is read first so no change is missed)"""
+        self.version = self._current_version()
+        self.gallery = self.loader()
+        self._checked_at = time.monotonic()
+    
+    def refresh(self):
+        """
+        Apply changes made since the cached version.
+        
+        Returns:
+            int: Number of change log entries applied
+        """
+        current = self._current_version()
+        self._checked_at = time.monotonic()
+        if current == self.version:
+            return 0
+        
+        entries = get_redis().zrangebyscore(f'{self.name}:changes', f'({self.version}', current)
+        if len(entries) != current - self.version:
+            self.reload()
+            return len(entries)
+        
+        # Last operation per key wins
+        latest = {}
+        for entry in entries:
+            _, op, key = entry.decode().split('|', 2)
+            latest[key] = op
+        
+        added_keys = [key for key, op in latest.items() if op == 'add']
+        removed_keys = [key for key, op in latest.items() if op == 'remove']
+        values = get_redis().hmget(self.name, added_keys) if added_keys else []
+        added = {key: value for key, value in zip(added_keys, values) if value is not None}
+        removed_keys += [key for key, value in zip(added_keys, values) if value is None]
+        
+        self.gallery = self.gallery.with_changes(added=added, removed=removed_keys)
+        self.version = current
+        return len(entries)
+    
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Gallery refresh failed; keeping the current gallery")
+        finally:
+            self._refreshing = False
+    
+    def get(self):
+        """
+        Return the current gallery, starting a background refresh if one is due.
+        
+        Only the first call loads synchronously (pages prime it before
+        streaming starts); later calls return immediately.
+        
+        Returns:
+            FaceGallery | ShardedFaceGallery: Current gallery
+        """
+        with self._lock:
+            if self.gallery is None:
+                self.reload()
+            elif not self._refreshing and time.monotonic() - self._checked_at >= self.min_interval:
+                self._refreshing = True
+                self._checked_at = time.monotonic()
+                threading.Thread(target=self._refresh_in_background, name='gallery-refresh', daemon=True).start()
+            return self.gallery
+
+def load_kiosk_gallery(name='staff:register'):
+    """
+    Load the gallery a clock-in/out kiosk should search, as configured by
+    KIOSK_ZONE, KIOSK_ZONE_FALLBACK and FACE_INDEX_BACKEND.
+    
+    Args:
+        name (str): Redis hash holding the staff register
+        
+    Returns:
+        FaceGallery | ShardedFaceGallery: Zone-sharded gallery if KIOSK_ZONE is set,
+            else a gallery of all staff
+    """
+    kiosk_zone = get_setting('KIOSK_ZONE')
+    index_backend = get_setting('FACE_INDEX_BACKEND', 'brute')
+    
+    if kiosk_zone:
+        # Search this kiosk's zone first, other zones only when nobody matches
+        gallery = ShardedFaceGallery(
+            kiosk_zone,
+            name=name,
+            fallback=str(get_setting('KIOSK_ZONE_FALLBACK', 'true')).lower() == 'true',
+            index_backend=index_backend
+        )
+        gallery.shard(kiosk_zone)
+        return gallery
+    
+    return FaceGallery.from_redis(name=name).set_index(index_backend)
+
+@st.cache_resource
+def get_kiosk_gallery_cache(name='staff:register'):
+    """
+    Process-wide GalleryCache shared by every kiosk session and rerun.
+    
+    Args:
+        name (str): Redis hash holding the staff register
+        
+    Returns:
+        GalleryCache: Incrementally refreshed kiosk gallery
+    """
+    return GalleryCache(lambda: load_kiosk_gallery(name), name=name,
+                        min_interval=get_setting('GALLERY_REFRESH_SECONDS', 5.0, float))
+
+def ml_search_algorithm(gallery, test_vector, name_role=['File No. Name', 'Role'], thresh=0.5):
     """
     Perform facial recognition search using cosine similarity.
     
     Args:
-        dataframe (pd.DataFrame): DataFrame containing staff facial features
-        feature_column (str): Name of column containing facial embeddings
+        gallery (FaceGallery): Precomputed gallery of staff facial features
         test_vector (np.array): Facial embedding to compare against
-        name_role (list): Column names for name and role in dataframe
+        name_role (list): Label columns for name and role
         thresh (float): Similarity threshold for positive match (0-1)
         
     Returns:
         tuple: (matched_name, matched_role) or ('Unknown', 'Unknown') if no match
     """
-    dataframe = dataframe.copy()
-    X_list = dataframe[feature_column].tolist()
-    X_cleaned = []
-    indices = []
-
-    # Clean and validate input vectors
-    for i, item in enumerate(X_list):
-        if isinstance(item, (list, np.ndarray)) and len(item) > 0:
-            item_arr = np.array(item)
-            if item_arr.shape == test_vector.shape:
-                X_cleaned.append(item_arr)
-                indices.append(i)
-
-    if len(X_cleaned) == 0:
-        return 'Unknown', 'Unknown'
-
-    dataframe = dataframe.iloc[indices].reset_index(drop=True)
-    x = np.array(X_cleaned)
-    similar = cosine_similarity(x, test_vector.reshape(1, -1))
-    similar_arr = similar.flatten()
-    dataframe['cosine'] = similar_arr
-    data_filter = dataframe[dataframe['cosine'] >= thresh]
-
-    if not data_filter.empty:
-        best_match = data_filter.sort_values(by='cosine', ascending=False).iloc[0]
-        person_name, person_role = best_match[name_role[0]], best_match[name_role[1]]
-    else:
-        person_name, person_role = 'Unknown', 'Unknown'
-
+    person_name, person_role = gallery.search(test_vector, name_role=name_role[:2], thresh=thresh)
     return person_name, person_role
 
 class RealTimePrediction:
@@ -147,139 +1111,185 @@ class RealTimePrediction:
     
     Attributes:
         logs (dict): Temporary storage for recognition results before saving to Redis
+        detector_profile (str): Detector size profile (see DETECTOR_PROFILES)
+        downscale (float): Factor applied to frames before detection
+        tracker (IoUTracker): Face tracker, or None to recognise every face on every frame
+        recognise_every (int): Frames between re-recognitions of a tracked face
+        detect_every (int): Run detection on one frame in this many
+        frame_index (int): Number of frames processed
+        results (collections.deque): Outcomes of recorded events, see pop_results
     """
     
-    def __init__(self):
-        """Initialize with empty logs dictionary"""
-        self.logs = dict(name=[], role=[], current_time=[])
+    def __init__(self, detector_profile='quality', downscale=1.0, track=False, recognise_every=15, detect_every=1):
+        """
+        Initialize with empty logs dictionary.
+        
+        Args:
+            detector_profile (str): Detector size profile, e.g. 'fast' for kiosks
+            downscale (float): Factor (0-1] applied to frames before detection
+            track (bool): Track faces across frames and cache their identity
+            recognise_every (int): With tracking, frames between re-recognitions of a face
+            detect_every (int): With tracking, run detection on one frame in this many
+        """
+        if detector_profile not in DETECTOR_PROFILES:
+            raise ValueError(f"Unknown detector profile '{detector_profile}', expected one of {sorted(DETECTOR_PROFILES)}")
+        self.detector_profile = detector_profile
+        self.downscale = downscale
+        self.tracker = IoUTracker() if track else None
+        self.recognise_every = recognise_every
+        self.detect_every = max(1, detect_every)
+        self.frame_index = 0
+        self.results = collections.deque(maxlen=100)
+        self.logs = dict(name=[], role=[], zone=[], current_time=[], score=[])
     
     def reset_dict(self):
         """Reset the logs dictionary to empty state"""
-        self.logs = dict(name=[], role=[], current_time=[])
+        self.logs = dict(name=[], role=[], zone=[], current_time=[], score=[])
 
-    def check_last_action(self, name, current_action):
+    def saveLogs_redis(self, Clock_In_Out, writer=None):
         """
-        Check if the current action is valid based on previous logs.
+        Validate and save recognition logs to Redis.
         
         Args:
-            name (str): Staff name to check
-            current_action (str): Current action ('Clock_In' or 'Clock_Out')
+            Clock_In_Out (str): Type of action ('Clock_In' or 'Clock_Out')
+            writer (AttendanceWriter): If given, queue the events and return at once;
+                outcomes are appended to `results` as the writer records them
             
         Returns:
-            bool: True if action is valid, False if it violates sequence rules
+            list: (name, status) per recognised staff member, where status is
+                ACTION_RECORDED or ACTION_DUPLICATE (empty when queued on a writer)
         """
-        if name == 'Unknown':
-            return True
+        dataframe = pd.DataFrame(self.logs)
+        dataframe.drop_duplicates('name', inplace=True)
+        dataframe = dataframe[dataframe['name'] != 'Unknown']
+        events = [(name, role, zone, current_time, Clock_In_Out)
+                  for name, role, zone, current_time in zip(dataframe['name'], dataframe['role'],
+                                                            dataframe['zone'], dataframe['current_time'])]
+        self.reset_dict()
         
-        logs = load_logs('attendance:logs', end=10)
-        last_action = None
-        last_date = None
+        if not events:
+            return []
         
-        for log in logs:
-            if isinstance(log, bytes):
-                log = log.decode('utf-8')
-            
-            parts = log.split('@')
-            if len(parts) == 4:
-                log_name, _, log_timestamp, log_action = parts
-                if log_name == name:
-                    try:
-                        log_datetime = datetime.strptime(log_timestamp.split('.')[0], '%Y-%m-%d %H:%M:%S')
-                        log_date = log_datetime.date()
-                        
-                        if last_date is None or log_datetime > last_date:
-                            last_action = log_action
-                            last_date = log_datetime
-                    except:
-                        continue
-        
-        if last_action is None:
-            return True
-        
-        current_date = datetime.now().date()
-        same_day = (last_date.date() == current_date) if last_date else False
-        
-        if not same_day:
-            return True
-        
-        if last_action == 'Clock_In' and current_action == 'Clock_Out':
-            return True
-        elif last_action == 'Clock_Out' and current_action == 'Clock_In':
-            return True
-        elif last_action == current_action:
-            return False
+        if writer is not None:
+            writer.submit(events, callback=self._on_result)
+            return []
         
-        return True
-
-    def saveLogs_redis(self, Clock_In_Out):
+        results = []
+        for (name, _, _, _, _), status in zip(events, record_clock_events(events)):
+            self._on_result(name, Clock_In_Out, status)
+            results.append((name, status))
+        return results
+    
+    def _on_result(self, name, action, status):
+        """Keep the outcome of a recorded event for the page to display"""
+        if status == ACTION_DUPLICATE:
+            logger.info("Action blocked: %s attempted %s after previous action", name, action)
+        self.results.append((name, status))
+    
+    def pop_results(self):
         """
-        Save recognition logs to Redis after validation.
+        Return and clear the outcomes recorded since the last call.
         
-        Args:
-            Clock_In_Out (str): Type of action ('Clock_In' or 'Clock_Out')
+        Returns:
+            list: (name, status) tuples
         """
-        dataframe = pd.DataFrame(self.logs)
-        dataframe.drop_duplicates('name', inplace=True)
-        name_list = dataframe['name'].tolist()
-        role_list = dataframe['role'].tolist()
-        current_time_list = dataframe['current_time'].tolist()
-        encoded_data = []
-
-        for name, role, current_time in zip(name_list, role_list, current_time_list):
-            if name != 'Unknown':
-                if self.check_last_action(name, Clock_In_Out):
-                    concat_string = f"{name}@{role}@{current_time}@{Clock_In_Out}"
-                    encoded_data.append(concat_string)
-                else:
-                    print(f"Action blocked: {name} attempted {Clock_In_Out} after previous action")
-
-        if len(encoded_data) > 0:
-            r.lpush('attendance:logs', *encoded_data)
-
-        self.reset_dict()
+        results = []
+        while self.results:
+            results.append(self.results.popleft())
+        return results
 
-    def face_prediction(self, test_image, dataframe, feature_column, name_role=['File No. Name', 'Role'], thresh=0.5):
+    def face_prediction(self, test_image, gallery, name_role=['File No. Name', 'Role'], thresh=0.5, one_to_one=False):
         """
         Perform face detection and recognition on an input image.
         
         Args:
             test_image (np.array): Input image frame
-            dataframe (pd.DataFrame): Staff database with facial features
-            feature_column (str): Column name containing facial embeddings
-            name_role (list): Column names for name and role
+            gallery (FaceGallery | ShardedFaceGallery): Precomputed gallery of staff facial features
+            name_role (list): Label columns for name, role and (optionally) zone;
+                without a zone column events are logged under DEFAULT_ZONE
             thresh (float): Similarity threshold for recognition
+            one_to_one (bool): Prevent two faces in the frame resolving to the same staff member
+                (off by default: an assignment can move a face onto a non-top-1 match)
             
         Returns:
             np.array: Annotated image with detection boxes and recognition results
         """
         current_time = str(datetime.now())
-        results = faceapp.get(test_image)
         test_copy = test_image.copy()
+        self.frame_index += 1
         
-        for res in results:
-            x1, y1, x2, y2 = res['bbox'].astype(int)
-            embeddings = res['embedding']
-            person_name, person_role = ml_search_algorithm(dataframe, 
-                                                          feature_column,
-                                                          test_vector=embeddings,
-                                                          name_role=name_role,
-                                                          thresh=thresh)
-            
-            if person_name == 'Unknown':
-                color = (0, 0, 255)  # Red for unknown
-            else:
-                color = (0, 255, 0)  # Green for known
+        if self.tracker is not None:
+            return self._tracked_prediction(test_image, test_copy, current_time, gallery, name_role, thresh, one_to_one)
+        
+        results = detect_faces(test_image, self.detector_profile, self.downscale)
+        if not results:
+            return test_copy
+        
+        # Match all faces in the frame at once
+        embeddings = np.stack([res['embedding'] for res in results])
+        labels, scores = gallery.search_batch(embeddings, name_role, thresh=thresh, one_to_one=one_to_one)
+        
+        for res, label, score in zip(results, labels, scores):
+            person_name, person_role, zone = self._split_label(label)
+            self._draw(test_copy, res['bbox'], person_name, current_time)
+            self._log(person_name, person_role, zone, current_time, score)
+        
+        return test_copy
+    
+    def _tracked_prediction(self, test_image, test_copy, current_time, gallery, name_role, thresh, one_to_one):
+        """
+        Detect (every `detect_every` frames), track, and recognise only new tracks
+        or tracks due for re-recognition; a track is logged only when its identity changes.
+        """
+        if (self.frame_index - 1) % self.detect_every == 0:
+            faces = detect_faces(test_image, self.detector_profile, self.downscale, embed=False)
+            tracks = self.tracker.update([face['bbox'] for face in faces])
+            pending = [(face, track) for face, track in zip(faces, tracks)
+                       if track.needs_recognition(self.frame_index, self.recognise_every)]
             
-            cv2.rectangle(test_copy, (x1, y1), (x2, y2), color)
-            text_gen = person_name
-            cv2.putText(test_copy, text_gen, (x1, y1), cv2.FONT_HERSHEY_DUPLEX, 0.7, color, 2)
-            cv2.putText(test_copy, current_time, (x1, y2+10), cv2.FONT_HERSHEY_DUPLEX, 0.7, color, 2)
-
-            self.logs['name'].append(person_name)
-            self.logs['role'].append(person_role)
-            self.logs['current_time'].append(current_time)
+            if pending:
+                embed_faces(test_image, [face for face, _ in pending])
+                embeddings = np.stack([face['embedding'] for face, _ in pending])
+                labels, scores = gallery.search_batch(embeddings, name_role, thresh=thresh, one_to_one=one_to_one)
+                
+                for (face, track), label, score in zip(pending, labels, scores):
+                    person_name, person_role, zone = self._split_label(label)
+                    if person_name != track.name:
+                        self._log(person_name, person_role, zone, current_time, score)
+                    track.name, track.role, track.zone, track.score = person_name, person_role, zone, float(score)
+                    track.recognised_at = self.frame_index
+        
+        for track in self.tracker.visible():
+            self._draw(test_copy, track.bbox, track.name, current_time)
         
         return test_copy
+    
+    @staticmethod
+    def _split_label(label):
+        """(name, role[, zone]) label tuple -> (name, role, zone)"""
+        zone = label[2] if len(label) > 2 else DEFAULT_ZONE
+        return label[0], label[1], zone
+    
+    def _log(self, person_name, person_role, zone, current_time, score):
+        """Queue a recognition result for the next saveLogs_redis"""
+        self.logs['name'].append(person_name)
+        self.logs['role'].append(person_role)
+        self.logs['zone'].append(zone)
+        self.logs['current_time'].append(current_time)
+        self.logs['score'].append(float(score))
+    
+    def _draw(self, image, bbox, person_name, current_time):
+        """Draw a recognition box, name and time on the frame"""
+        x1, y1, x2, y2 = np.asarray(bbox).astype(int)[:4]
+        
+        if person_name == 'Unknown':
+            color = (0, 0, 255)  # Red for unknown
+        else:
+            color = (0, 255, 0)  # Green for known
+        
+        cv2.rectangle(image, (x1, y1), (x2, y2), color)
+        cv2.putText(image, person_name, (x1, y1), cv2.FONT_HERSHEY_DUPLEX, 0.7, color, 2)
+        cv2.putText(image, current_time, (x1, y2+10), cv2.FONT_HERSHEY_DUPLEX, 0.7, color, 2)
 
 class RegistrationForm:
     """
@@ -287,19 +1297,43 @@ class RegistrationForm:
     
     Attributes:
         sample (int): Counter for collected face samples
+        buffer (EmbeddingBuffer): Captured embeddings of this registration session,
+            each scored with utils.enrollment.sample_quality
+        report (dict): Template quality report of the last save attempt (None before)
     """
     
-    def __init__(self):
-        """Initialize with sample counter at 0"""
+    def __init__(self, max_samples=None, spill_dir=None):
+        """
+        Initialize with sample counter at 0 and an empty embedding buffer.
+        
+        Args:
+            max_samples (int): Samples kept (default REGISTRATION_MAX_SAMPLES setting, 200);
+                older samples are overwritten once full
+            spill_dir (str): Directory for a per-session .npy spill file
+                (default REGISTRATION_SPILL_DIR setting; memory only if unset)
+        """
         self.sample = 0
+        self.max_samples = max_samples or get_setting('REGISTRATION_MAX_SAMPLES', 200, int)
+        self.spill_dir = spill_dir or get_setting('REGISTRATION_SPILL_DIR')
+        self.buffer = self._new_buffer()
+        self.report = None
+
+    def _new_buffer(self):
+        """Empty embedding buffer, spilled to a uniquely named file when spill_dir is set"""
+        spill_path = None
+        if self.spill_dir:
+            spill_path = os.path.join(self.spill_dir, f"registration_{uuid.uuid4().hex}.npy")
+        return EmbeddingBuffer(capacity=self.max_samples, spill_path=spill_path)
 
     def reset(self):
-        """Reset the sample counter to 0"""
+        """Reset the sample counter to 0 and drop the captured embeddings"""
         self.sample = 0
+        self.buffer.clear()
 
     def get_embedding(self, frame):
         """
-        Detect faces in frame and collect embeddings.
+        Detect faces in frame and collect their embeddings, with a quality score,
+        into the buffer.
         
         Args:
             frame (np.array): Input image frame
@@ -307,13 +1341,17 @@ class RegistrationForm:
         Returns:
             tuple: (annotated_frame, embeddings) where:
                 - annotated_frame: Input frame with detection boxes drawn
-                - embeddings: Facial embeddings if face detected, else None
+                - embeddings: Embedding of the largest face if any detected, else None
         """
-        results = faceapp.get(frame)
+        results = detect_faces(frame, profile='quality')
         embeddings = None
         
         if results:
-            for res in results:
+            # Score every face on the untouched frame; drawn boxes would
+            # otherwise count as sharp edges in the blur measure
+            qualities = [sample_quality(frame, res) for res in results]
+            
+            for res, quality in zip(results, qualities):
                 self.sample += 1
                 x1, y1, x2, y2 = res['bbox'].astype(int)
                 
@@ -326,11 +1364,15 @@ class RegistrationForm:
                 cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
                 
                 # Draw text above the box
-                text = f"samples = {self.sample}"
+                text = f"samples = {self.sample} quality = {quality['score']:.2f}"
                 cv2.putText(frame, text, (x1, y1 - 10), 
                         cv2.FONT_HERSHEY_DUPLEX, 0.6, (255, 255, 0), 2)
-                
-                embeddings = res['embedding']
+            
+            # Enroll only the largest face so bystanders never enter the template
+            areas = [(res['bbox'][2] - res['bbox'][0]) * (res['bbox'][3] - res['bbox'][1]) for res in results]
+            largest = int(np.argmax(areas))
+            embeddings = results[largest]['embedding']
+            self.buffer.append(embeddings, qualities[largest]['score'])
         
         return frame, embeddings
     
@@ -346,7 +1388,8 @@ class RegistrationForm:
             zone (str): Geographic zone (default 'Lagos Zone 2')
             
         Returns:
-            str/bool: True if successful, error message string if failed
+            str/bool: True if successful, error message string if failed;
+                self.report describes the template quality either way
         """
         if file_number is not None:
             if first_name.strip() != '':
@@ -356,50 +1399,70 @@ class RegistrationForm:
         else:
             return 'false file number'
         
-        if 'face_embedding.txt' not in os.listdir():
-            return 'No face_embedding.txt'
-
-        # load face_embedding.txt and convert into array
-        x_array = np.loadtxt('face_embedding.txt', dtype=np.float32)
-
-        received_samples = int(x_array.size/512)
-        x_array = x_array.reshape(received_samples,512)
-        x_array = np.asarray(x_array)
-
-        # calc. the mean embeddings
-        x_mean = x_array.mean(axis=0)
-        x_mean = x_mean.astype(np.float32)
-        x_mean_bytes = x_mean.tobytes()
+        if len(self.buffer) == 0:
+            return 'No face samples'
+        
+        # Keep the best samples, drop outliers and build a normalized template
+        template, self.report = build_template(
+            self.buffer.samples(),
+            self.buffer.qualities(),
+            top_k=get_setting('REGISTRATION_TOP_K', 20, int),
+            min_quality=get_setting('REGISTRATION_MIN_QUALITY', 0.2, float),
+            max_distance=get_setting('REGISTRATION_MAX_DISTANCE', 0.35, float),
+            min_samples=get_setting('REGISTRATION_MIN_SAMPLES', 5, int)
+        )
+        if template is None:
+            self.reset()
+            return 'Low quality samples'
 
         # save into redis database
-        r.hset(name='staff:register', key=key, value=x_mean_bytes)
+        register_staff(key, template.tobytes())
 
-        os.remove('face_embedding.txt')
-        self.reset()
+        # Drop the saved samples and their spill file; the next registration starts afresh
+        self.buffer.close()
+        self.buffer = self._new_buffer()
+        self.sample = 0
         
         return True
 
+def new_verification_buffer():
+    """
+    Empty running-mean buffer for one StaffMovement/StaffDutyReport verification session.
+    
+    Returns:
+        RunningMeanBuffer: Bounded by the VERIFICATION_MAX_SAMPLES setting (default 200)
+    """
+    return RunningMeanBuffer(max_samples=get_setting('VERIFICATION_MAX_SAMPLES', 200, int))
+
 class StaffMovement:
     """
     Class for handling staff movement tracking with facial verification.
     
     Attributes:
         recognizer (RealTimePrediction): Instance for face recognition
-        staff_df (pd.DataFrame): Staff database with facial features
+        gallery (FaceGallery): Precomputed gallery of staff facial features
         sample (int): Counter for collected face samples
+        buffer (RunningMeanBuffer): Running mean of this session's face embeddings
     """
     
-    def __init__(self):
-        """Initialize with RealTimePrediction instance and loaded staff data"""
+    def __init__(self, buffer=None):
+        """
+        Initialize with RealTimePrediction instance and loaded staff data.
+        
+        Args:
+            buffer (RunningMeanBuffer): Session buffer to collect into; pass the same
+                buffer on every Streamlit rerun so samples survive (default: a new one
+                bounded by the VERIFICATION_MAX_SAMPLES setting, 200)
+        """
         self.recognizer = RealTimePrediction()
-        self.staff_df = retrive_data(name='staff:register')
+        self.gallery = FaceGallery.from_redis(name='staff:register')
         self.sample = 0
+        self.buffer = buffer if buffer is not None else new_verification_buffer()
     
     def reset(self):
-        """Reset sample counter and clean up temporary files"""
+        """Reset sample counter and drop the collected embeddings"""
         self.sample = 0
-        if os.path.exists('movement_embedding.txt'):
-            os.remove('movement_embedding.txt')
+        self.buffer.clear()
 
     def get_embedding(self, frame):
         """
@@ -411,7 +1474,7 @@ class StaffMovement:
         Returns:
             np.array: Annotated frame with detection boxes drawn
         """
-        results = faceapp.get(frame)
+        results = detect_faces(frame, profile='quality')
         reg_img = frame.copy()
         embeddings = None
         
@@ -435,10 +1498,9 @@ class StaffMovement:
                 
                 embeddings = res['embedding']
         
-        # Save embedding to file if exists
+        # Add embedding to the session buffer if one was found
         if embeddings is not None:
-            with open('movement_embedding.txt', mode='ab') as f:
-                np.savetxt(f, embeddings)
+            self.buffer.append(embeddings)
         
         return reg_img
 
@@ -455,19 +1517,14 @@ class StaffMovement:
         Returns:
             str/bool: True if successful, error message if verification fails
         """
-        # Check if face data exists
-        if not os.path.exists('movement_embedding.txt'):
+        # Mean of the collected face embeddings
+        x_mean = self.buffer.mean()
+        if x_mean is None:
             return 'No face embedding found'
         
-        # Load and process embeddings
-        x_array = np.loadtxt('movement_embedding.txt', dtype=np.float32)
-        x_array = x_array.reshape(-1, 512)
-        x_mean = x_array.mean(axis=0)
-        
         # Verify staff
         person_name, person_role = ml_search_algorithm(
-            self.staff_df,
-            'Facial_features',
+            self.gallery,
             test_vector=x_mean,
             thresh=0.5
         )
@@ -481,7 +1538,7 @@ class StaffMovement:
         movement_data = f"{person_name}@{person_role}@{current_time}@{movement_type}@{purpose}@{location}@{note}"
         
         # Save to Redis
-        r.lpush('staff:movement:logs', movement_data)
+        get_redis().lpush(MOVEMENT_LOGS_KEY, movement_data)
         self.reset()
         
         return True
@@ -492,21 +1549,29 @@ class StaffDutyReport:
     
     Attributes:
         recognizer (RealTimePrediction): Instance for face recognition
-        staff_df (pd.DataFrame): Staff database with facial features
+        gallery (FaceGallery): Precomputed gallery of staff facial features
         sample (int): Counter for collected face samples
+        buffer (RunningMeanBuffer): Running mean of this session's face embeddings
     """
     
-    def __init__(self):
-        """Initialize with RealTimePrediction instance and loaded staff data"""
+    def __init__(self, buffer=None):
+        """
+        Initialize with RealTimePrediction instance and loaded staff data.
+        
+        Args:
+            buffer (RunningMeanBuffer): Session buffer to collect into; pass the same
+                buffer on every Streamlit rerun so samples survive (default: a new one
+                bounded by the VERIFICATION_MAX_SAMPLES setting, 200)
+        """
         self.recognizer = RealTimePrediction()
-        self.staff_df = retrive_data(name='staff:register')
+        self.gallery = FaceGallery.from_redis(name='staff:register')
         self.sample = 0
+        self.buffer = buffer if buffer is not None else new_verification_buffer()
     
     def reset(self):
-        """Reset sample counter and clean up temporary files"""
+        """Reset sample counter and drop the collected embeddings"""
         self.sample = 0
-        if os.path.exists('duty_report_embedding.txt'):
-            os.remove('duty_report_embedding.txt')
+        self.buffer.clear()
 
     def get_embedding(self, frame):
         """
@@ -518,7 +1583,7 @@ class StaffDutyReport:
         Returns:
             np.array: Annotated frame with detection boxes drawn
         """
-        results = faceapp.get(frame)
+        results = detect_faces(frame, profile='quality')
         reg_img = frame.copy()
         embeddings = None
         
@@ -542,10 +1607,9 @@ class StaffDutyReport:
                 
                 embeddings = res['embedding']
         
-        # Save embedding to file if exists
+        # Add embedding to the session buffer if one was found
         if embeddings is not None:
-            with open('duty_report_embedding.txt', mode='ab') as f:
-                np.savetxt(f, embeddings)
+            self.buffer.append(embeddings)
         
         return reg_img
 
@@ -559,19 +1623,14 @@ class StaffDutyReport:
         Returns:
             str/bool: True if successful, error message if verification fails
         """
-        # Verify signer's identity
-        if not os.path.exists('duty_report_embedding.txt'):
+        # Verify signer's identity from the mean of the collected embeddings
+        x_mean = self.buffer.mean()
+        if x_mean is None:
             return 'No face verification found'
         
-        # Load and process embeddings
-        x_array = np.loadtxt('duty_report_embedding.txt', dtype=np.float32)
-        x_array = x_array.reshape(-1, 512)
-        x_mean = x_array.mean(axis=0)
-        
         # Verify staff
         signer_name, signer_role = ml_search_algorithm(
-            self.staff_df,
-            'Facial_features',
+            self.gallery,
             test_vector=x_mean,
             thresh=0.5
         )
@@ -586,7 +1645,7 @@ class StaffDutyReport:
         report_data['timestamp'] = current_time
         
         # Save to Redis
-        r.hset(f'duty_report:{current_time}', mapping=report_data)
+        get_redis().hset(f'{DUTY_REPORT_PREFIX}{current_time}', mapping=report_data)
         self.reset()
         
         return True
@@ -600,7 +1659,7 @@ def migrate_redis_data():
         str: Migration completion message
     """
     # Retrieve all existing data
-    old_data = r.hgetall('staff:register')
+    old_data = get_redis().hgetall('staff:register')
     
     for key, value in old_data.items():
         key_str = key.decode('utf-8')
@@ -609,8 +1668,12 @@ def migrate_redis_data():
             # Add default zone
             new_key = f"{key_str}@Lagos Zone 2"
             # Update Redis with new key
-            r.hset('staff:register', new_key, value)
+            get_redis().hset('staff:register', new_key, value)
             # Remove old key
-            r.hdel('staff:register', key)
+            get_redis().hdel('staff:register', key)
+    
+    # Keys changed outside the change log, so reindex zones and force galleries to reload
+    rebuild_staff_zone_index('staff:register')
+    get_redis().incr(STAFF_VERSION_KEY)
     
     return "Migration completed successfully"
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""
+Move attendance events from the legacy attendance:logs list into the
+event store read by the attendance pages (see attendance_store.query_attendance).
+
+The legacy list is snapshotted (renamed to attendance:logs:migrating)
+before it is read and renamed to attendance:logs:migrated afterwards, so
+the migration runs once; entries pushed by kiosks still on the old code
+during the run land in a new list, which a second run migrates. Today's
+entries also seed today's last-action state. Redis settings come from .streamlit/secrets.toml or
+the REDIS_* environment variables.
+
+Dashboard counters can be recomputed from the stored events with
+--rebuild-aggregates (e.g. after restoring events from a backup).
+
+Usage:
+    python migrate_attendance.py --batch-size 1000
+    python migrate_attendance.py --rebuild-aggregates
+"""
+import argparse
+
+from utils import attendance_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--key', default=attendance_store.LEGACY_ATTENDANCE_KEY, help='Legacy attendance list key')
+    parser.add_argument('--rebuild-aggregates', action='store_true', help='Only recompute the dashboard counters')
+    args = parser.parse_args()
+
+    if args.rebuild_aggregates:
+        counted = attendance_store.rebuild_attendance_aggregates(chunk_size=args.batch_size)
+        print(f"Rebuilt dashboard counters from {counted} attendance events")
+        return
+
+    counts = attendance_store.migrate_attendance_logs(batch_size=args.batch_size, legacy_key=args.key)
+    print(f"Migrated {counts['migrated']} attendance events ({counts['skipped']} malformed entries skipped)")
+
+
+if __name__ == '__main__':
+    main()
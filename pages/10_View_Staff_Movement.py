@@ -1,12 +1,11 @@
 from utils.config import configure_app
 configure_app()
 import streamlit as st
-import pandas as pd
 import redis
-import csv
-from io import StringIO
 from datetime import datetime
 import face_utils
+from utils.export import export_controls
+from utils.pagination import cursor_pager, format_datetime_columns, page_size_control
 from auth import authenticator
 
 from utils.session import init_auth_session_keys
@@ -52,93 +51,71 @@ else:
             
         # Rest of your app content would go here
         
-        def load_movement_logs():
-            """Load all movement logs from Redis"""
-            logs_list = r.lrange('staff:movement:logs', 0, -1)
-            records = []
-            
-            for log in logs_list:
-                if isinstance(log, bytes):
-                    log = log.decode('utf-8')
-                
-                parts = log.split('@')
-                if len(parts) == 7:
-                    name, role, timestamp, movement_type, purpose, location, note = parts
-                    records.append({
-                        'Name': name,
-                        'Role': role,
-                        'Timestamp': timestamp,
-                        'Movement Type': movement_type,
-                        'Purpose': purpose,
-                        'Location': location,
-                        'Note': note
-                    })
-            
-            return pd.DataFrame(records)
+        def filter_movement(movement_df, name_filter, movement_filter, date_filter):
+            """Apply the page filters to an export chunk of movement records"""
+            if name_filter:
+                movement_df = movement_df[movement_df['Name'].str.contains(name_filter, case=False, regex=False)]
+            if movement_filter != 'All':
+                movement_df = movement_df[movement_df['Movement Type'] == movement_filter]
+            if date_filter is not None:
+                movement_df = movement_df[movement_df['Timestamp'].dt.date == date_filter]
+            return movement_df
+
+        def export_movement(name_filter, movement_filter, date_filter):
+            """Stream the filtered movement records from Redis chunk by chunk for export"""
+            for chunk in face_utils.iter_movement_logs():
+                chunk = filter_movement(chunk, name_filter, movement_filter, date_filter)
+                if not chunk.empty:
+                    yield chunk
 
         def clear_movement_logs():
             """Clear all movement logs from Redis"""
-            r.delete('staff:movement:logs')
+            r.delete(face_utils.MOVEMENT_LOGS_KEY)
             st.success("All movement records have been cleared!")
 
-        def convert_df_to_csv(df):
-            """Convert DataFrame to CSV string"""
-            output = StringIO()
-            df.to_csv(output, index=False)
-            return output.getvalue()
-
-        # Load movement data
-        movement_df = load_movement_logs()
-
-        if not movement_df.empty:
-            # Convert timestamp to datetime and sort
-            movement_df['Timestamp'] = pd.to_datetime(movement_df['Timestamp'])
-            movement_df.sort_values('Timestamp', ascending=False, inplace=True)
-            
-            # Display filters
+        if r.exists(face_utils.MOVEMENT_LOGS_KEY):
+            # Filter options are fixed, so no records are loaded to build them
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                name_filter = st.selectbox(
-                    'Filter by Name',
-                    ['All'] + sorted(movement_df['Name'].unique().tolist())
-                )
+                name_filter = st.text_input('Filter by Name').strip()
             
             with col2:
                 movement_filter = st.selectbox(
                     'Filter by Movement Type',
-                    ['All'] + sorted(movement_df['Movement Type'].unique().tolist())
+                    ['All'] + face_utils.MOVEMENT_TYPES
                 )
             
             with col3:
-                date_filter = st.selectbox(
-                    'Filter by Date',
-                    ['All'] + sorted(movement_df['Timestamp'].dt.date.unique().astype(str).tolist())
+                date_filter = st.date_input('Filter by Date', value=None)
+
+            def fetch_page(cursor, page_size):
+                """Read one page of the filtered movement records from Redis"""
+                return face_utils.page_movement_logs(
+                    cursor=cursor,
+                    page_size=page_size,
+                    name=name_filter or None,
+                    movement_type=None if movement_filter == 'All' else movement_filter,
+                    day=date_filter
                 )
             
-            # Apply filters
-            if name_filter != 'All':
-                movement_df = movement_df[movement_df['Name'] == name_filter]
-            
-            if movement_filter != 'All':
-                movement_df = movement_df[movement_df['Movement Type'] == movement_filter]
-            
-            if date_filter != 'All':
-                movement_df = movement_df[movement_df['Timestamp'].dt.date.astype(str) == date_filter]
-            
-            # Display the filtered DataFrame
-            st.dataframe(movement_df.style.format({'Timestamp': lambda x: x.strftime('%Y-%m-%d %H:%M:%S')}))
+            # Only the current page is read from Redis, newest first
+            page_size = page_size_control('movement')
+            page_df = cursor_pager('movement', fetch_page, page_size,
+                                   filters=(name_filter, movement_filter, date_filter))
+            if page_df.empty:
+                st.info("No movement records match the filters")
+            else:
+                st.dataframe(format_datetime_columns(page_df, ['Timestamp']), hide_index=True)
             
             # Download and Clear buttons
             col1, col2 = st.columns(2)
             
             with col1:
-                csv_data = convert_df_to_csv(movement_df)
-                st.download_button(
-                    label="Download as CSV",
-                    data=csv_data,
-                    file_name=f"staff_movement_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime='text/csv'
+                export_controls(
+                    'movement',
+                    lambda: export_movement(name_filter, movement_filter, date_filter),
+                    f"staff_movement_{datetime.now().strftime('%Y%m%d')}"
                 )
             
             with col2:
@@ -1,4 +1,4 @@
-from utils.config import configure_app
+from utils.config import configure_app, get_setting
 configure_app()
 import streamlit as st
 from streamlit_webrtc import webrtc_streamer
@@ -29,11 +29,23 @@ if not access_granted:
 # Retrieve the data from Redis Database
 with st.spinner('Retrieving Data from Database ...'):
     import face_utils
-    redis_face_db = face_utils.retrive_data(name='staff:register')
+    from utils import attendance_store
+    gallery_cache = face_utils.get_kiosk_gallery_cache(name='staff:register')
+    gallery_cache.get()
+    face_utils.get_faceapp()  # load the model now rather than on the first frame
 
 waitTime = 5  # time in sec
 setTime = time.time()
-realtimepred = face_utils.RealTimePrediction()
+# Kiosk users stand close to the camera, so a smaller detector is enough
+realtimepred = face_utils.RealTimePrediction(
+    detector_profile=get_setting('CLOCK_DETECTOR_PROFILE', 'fast'),
+    downscale=get_setting('CLOCK_FRAME_DOWNSCALE', 1.0, float),
+    # Track faces between frames; recognise new faces and re-check every N frames
+    track=True,
+    recognise_every=get_setting('CLOCK_RECOGNISE_EVERY', 15, int),
+    detect_every=get_setting('CLOCK_DETECT_EVERY', 2, int)
+)
+attendance_writer = attendance_store.get_attendance_writer()
 last_action_status = None
 
 def video_frame_callback(frame):
@@ -42,8 +54,7 @@ def video_frame_callback(frame):
     img = frame.to_ndarray(format="bgr24")
     pred_img = realtimepred.face_prediction(
         img,
-        redis_face_db,
-        'Facial_features',
+        gallery_cache.get(),
         ['File No. Name', 'Role', 'Zone'],  # Added Zone to name_role
         thresh=0.5
     )
@@ -52,16 +63,19 @@ def video_frame_callback(frame):
     difftime = timenow - setTime
 
     if difftime >= waitTime:
-        # Check if action is allowed before saving
-        if any(realtimepred.logs['name']):
-            name = realtimepred.logs['name'][0]
-            if realtimepred.check_last_action(name, 'Clock_In'):
-                realtimepred.saveLogs_redis(Clock_In_Out='Clock_In')
-                last_action_status = "✔️ Clock-In recorded"
-            else:
-                last_action_status = "❌ Already clocked-in today"
+        # Queue for the background writer; the frame never waits on Redis
+        realtimepred.saveLogs_redis(Clock_In_Out='Clock_In', writer=attendance_writer)
         setTime = time.time()
 
+    # Show the outcome of events the writer has recorded since the last frame
+    results = realtimepred.pop_results()
+    if results:
+        statuses = [status for _, status in results]
+        if attendance_store.ACTION_RECORDED in statuses:
+            last_action_status = "✔️ Clock-In recorded"
+        else:
+            last_action_status = "❌ Already clocked-in today"
+
     # Add status text to the frame if available
     if last_action_status:
         cv2.putText(pred_img, last_action_status, (10, 30), 
@@ -69,6 +83,15 @@ def video_frame_callback(frame):
 
     return av.VideoFrame.from_ndarray(pred_img, format="bgr24")
 
+# Writer health as of this run (the counters are shared by every kiosk session)
+writer_stats = attendance_writer.stats()
+st.sidebar.subheader('Attendance Writer')
+st.sidebar.metric('Events written', writer_stats['written'])
+st.sidebar.metric('Dropped (queue full)', writer_stats['dropped'])
+st.sidebar.metric('Failed (Redis errors)', writer_stats['failed'])
+st.sidebar.caption(f"Queue depth: {writer_stats['queue_depth']}" + (
+    f" · avg write {writer_stats['avg_write_ms']:.1f} ms" if writer_stats['avg_write_ms'] is not None else ''))
+
 webrtc_streamer(key="realtimePrediction", video_frame_callback=video_frame_callback,
 rtc_configuration={
         "iceServers": [{"urls": ["stun:stun.l.google.com:19302"]}]
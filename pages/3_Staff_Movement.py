@@ -32,7 +32,11 @@ def main():
     # Rest of your app content would go here
     
     # Initialize StaffMovement
-    staff_movement = face_utils.StaffMovement()
+    # The embedding buffer lives in the session so samples from the camera
+    # callback survive reruns and are never shared with other users
+    if 'movement_buffer' not in st.session_state:
+        st.session_state.movement_buffer = face_utils.new_verification_buffer()
+    staff_movement = face_utils.StaffMovement(buffer=st.session_state.movement_buffer)
 
     # Form layout
     col1, col2 = st.columns(2)
@@ -41,7 +45,7 @@ def main():
         # Movement type selection
         movement_type = st.radio(
             "Movement Type:",
-            options=["Clock_In", "Clock_Out"],
+            options=face_utils.MOVEMENT_TYPES,
             horizontal=True
         )
         
@@ -31,7 +31,11 @@ def main():
         st.stop()
     
     # Initialize StaffDutyReport
-    duty_report = face_utils.StaffDutyReport()
+    # The embedding buffer lives in the session so samples from the camera
+    # callback survive reruns and are never shared with other users
+    if 'duty_report_buffer' not in st.session_state:
+        st.session_state.duty_report_buffer = face_utils.new_verification_buffer()
+    duty_report = face_utils.StaffDutyReport(buffer=st.session_state.duty_report_buffer)
 
     # Form layout
     col1, col2 = st.columns(2)
@@ -40,14 +44,14 @@ def main():
         # Officer role selection
         officer_role = st.selectbox(
             "Your Role:",
-            options=["CRO", "Incident Duty Officer", "Visiting Rounds Senior Officer"],
+            options=face_utils.DUTY_ROLES,
             index=0
         )
         
         # Duty information
         duty_type = st.radio(
             "Duty Shift:",
-            options=["Morning (06:00-18:00)", "Night (18:00-06:00)"],
+            options=face_utils.DUTY_SHIFTS,
             index=0 if datetime.now().hour >= 6 and datetime.now().hour < 18 else 1
         )
         
@@ -1,18 +1,33 @@
-from utils.config import configure_app
+from utils.config import configure_app, get_setting
 configure_app()
 
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from datetime import datetime
-import face_utils
+from datetime import timedelta
+from utils import attendance_store
 import redis
 from auth import authenticator
 from utils.session import init_auth_session_keys
+from utils.attendance_analytics import SUMMARY_COLUMNS, summarise_chunks
+from utils.export import export_controls, frame_chunks
+from utils.pagination import format_datetime_columns, frame_pager, page_size_control
 
 init_auth_session_keys()
 
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_work_hours(start, end, roles, version, late_after, leave_before):
+    """Summarise work hours for a date range; `version` keys the cache on attendance:version"""
+    # Stream only the selected days' events from the day indexes
+    events = (chunk[chunk['Role'].isin(roles)]
+              for chunk in attendance_store.iter_attendance(start=start, end=end))
+    summaries = list(summarise_chunks((chunk for chunk in events if not chunk.empty),
+                                      late_after=late_after, leave_before=leave_before))
+    return pd.concat(summaries, ignore_index=True) if summaries else pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+
 # Set page config
 st.subheader('Attendance Visualization Dashboard')
 
@@ -35,96 +50,57 @@ else:
     authenticator.logout('Logout', 'sidebar')
     st.write(f'Welcome *{st.session_state["name"]}*')
 
-    # Redis connection
-    r = face_utils.r
-
-    def load_data_from_redis():
-        """Load and process attendance data from Redis"""
-        name = 'attendance:logs'
-        logs = face_utils.load_logs(name=name)
-
-        cleaned_logs = []
-        for log in logs:
-            if isinstance(log, bytes):
-                log = log.decode('utf-8')
-            log = log.strip("b'")
-            parts = log.split('@')
-            if len(parts) == 4:
-                file_name_role, role, timestamp, Clock_In_Out = parts
-                file_no, name = file_name_role.split('.', 1)
-
-                # Normalize Clock_In_Out values (important!)
-                Clock_In_Out = Clock_In_Out.strip().replace("-", "_").title()
-
-                cleaned_logs.append({
-                    'File No.': file_no,
-                    'Name': name,
-                    'Role': role,
-                    'Timestamp': timestamp,
-                    'Clock_In_Out': Clock_In_Out
-                })
-
-        if not cleaned_logs:
-            return pd.DataFrame()
-
-        df = pd.DataFrame(cleaned_logs)
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-        df['Date'] = df['Timestamp'].dt.date
-        df['Time'] = df['Timestamp'].dt.time
-        df['Hour'] = df['Timestamp'].dt.hour
-        df['Day'] = df['Timestamp'].dt.day_name()
-        return df
-
-    with st.spinner('Loading attendance data from Redis...'):
-        df = load_data_from_redis()
-
-    if df.empty:
+    # Dashboard charts read the per-day counters, never the raw events
+    min_date, max_date = attendance_store.attendance_date_bounds()
+    if min_date is None:
         st.warning("No attendance data found in Redis database")
         st.stop()
 
-    # Debug: Show unique Clock_In_Out values
-    st.write("🔍 Clock_In_Out values in dataset:", df['Clock_In_Out'].unique())
-
     # Sidebar filters
     st.sidebar.header('Filter Options')
-    selected_roles = st.sidebar.multiselect(
-        'Select Roles',
-        options=df['Role'].unique(),
-        default=df['Role'].unique()
-    )
-
     date_range = st.sidebar.date_input(
         'Select Date Range',
-        value=[df['Date'].min(), df['Date'].max()],
-        min_value=df['Date'].min(),
-        max_value=df['Date'].max()
+        value=[min_date, max_date],
+        min_value=min_date,
+        max_value=max_date
+    )
+    dates = list(date_range) if date_range else [min_date, max_date]
+    date_range = [dates[0], dates[-1]]
+
+    with st.spinner('Loading attendance data from Redis...'):
+        counts, staff = attendance_store.load_attendance_aggregates(date_range[0], date_range[1])
+
+    # Debug: Show unique Clock_In_Out values
+    st.write("🔍 Clock_In_Out values in dataset:", counts['Clock_In_Out'].unique())
+
+    selected_roles = st.sidebar.multiselect(
+        'Select Roles',
+        options=counts['Role'].unique(),
+        default=counts['Role'].unique()
     )
 
     # Filter data
-    filtered_df = df[
-        (df['Role'].isin(selected_roles)) &
-        (df['Date'] >= date_range[0]) &
-        (df['Date'] <= date_range[1])
-    ]
+    filtered_counts = counts[counts['Role'].isin(selected_roles)]
+    filtered_staff = staff[staff['Role'].isin(selected_roles)]
 
     st.write(f"Displaying data from {date_range[0]} to {date_range[1]}")
 
     # KPI cards
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total Records", len(filtered_df))
+        st.metric("Total Records", int(filtered_counts['Count'].sum()))
     with col2:
-        st.metric("Unique Employees", filtered_df['Name'].nunique())
+        st.metric("Unique Employees", filtered_staff['Name'].nunique())
     with col3:
-        st.metric("Date Range", f"{filtered_df['Date'].min()} to {filtered_df['Date'].max()}")
+        st.metric("Date Range", f"{filtered_counts['Date'].min()} to {filtered_counts['Date'].max()}")
 
     # Main charts
-    tab1, tab2, tab3 = st.tabs(["Daily Activity", "Employee Patterns", "Hourly Trends"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Daily Activity", "Employee Patterns", "Hourly Trends", "Work Hours"])
 
     with tab1:
         st.subheader("Daily Attendance Activity")
-        if not filtered_df.empty:
-            daily_counts = filtered_df.groupby(['Date', 'Clock_In_Out']).size().unstack(fill_value=0)
+        if not filtered_counts.empty:
+            daily_counts = filtered_counts.groupby(['Date', 'Clock_In_Out'])['Count'].sum().unstack(fill_value=0)
 
             fig, ax = plt.subplots(figsize=(10, 6))
             daily_counts.plot(kind='bar', stacked=True, ax=ax)
@@ -135,7 +111,7 @@ else:
             st.pyplot(fig)
 
             st.subheader("Activity by Day of Week")
-            day_counts = filtered_df.groupby(['Day', 'Clock_In_Out']).size().unstack(fill_value=0)
+            day_counts = daily_counts.groupby(pd.to_datetime(daily_counts.index).day_name()).sum()
             day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
             day_counts = day_counts.reindex(day_order)
 
@@ -151,8 +127,8 @@ else:
 
     with tab2:
         st.subheader("Employee Activity Patterns")
-        if not filtered_df.empty:
-            emp_activity = filtered_df.groupby(['Name', 'Clock_In_Out']).size().unstack(fill_value=0)
+        if not filtered_staff.empty:
+            emp_activity = filtered_staff.groupby(['Name', 'Clock_In_Out'])['Count'].sum().unstack(fill_value=0)
 
             # Ensure expected columns exist
             for col in ['Clock_In', 'Clock_Out']:
@@ -171,7 +147,7 @@ else:
             st.pyplot(fig)
 
             st.subheader("Employee Daily Presence")
-            emp_presence = filtered_df.groupby(['Name', 'Date']).size().unstack(fill_value=0)
+            emp_presence = filtered_staff.groupby(['Name', 'Date'])['Count'].sum().unstack(fill_value=0)
 
             fig, ax = plt.subplots(figsize=(12, 6))
             sns.heatmap(emp_presence, cmap='Blues', ax=ax)
@@ -184,8 +160,8 @@ else:
 
     with tab3:
         st.subheader("Hourly Activity Trends")
-        if not filtered_df.empty:
-            hourly_dist = filtered_df.groupby(['Hour', 'Clock_In_Out']).size().unstack(fill_value=0)
+        if not filtered_counts.empty:
+            hourly_dist = filtered_counts.groupby(['Hour', 'Clock_In_Out'])['Count'].sum().unstack(fill_value=0)
 
             fig, ax = plt.subplots(figsize=(10, 4))
             hourly_dist.plot(kind='area', stacked=True, ax=ax)
@@ -196,7 +172,7 @@ else:
             st.pyplot(fig)
 
             st.subheader("Role-Specific Hourly Patterns")
-            role_hourly = filtered_df.groupby(['Role', 'Hour']).size().unstack(fill_value=0)
+            role_hourly = filtered_counts.groupby(['Role', 'Hour'])['Count'].sum().unstack(fill_value=0)
 
             fig, ax = plt.subplots(figsize=(12, 6))
             sns.heatmap(role_hourly, cmap='YlOrRd', ax=ax)
@@ -207,6 +183,59 @@ else:
         else:
             st.warning("No data available for selected filters")
 
+    with tab4:
+        st.subheader("Daily Work Hours")
+        # Every tab renders on each rerun, so raw events are only read on request,
+        # for a short range by default, and cached per attendance version
+        hours_range = st.date_input(
+            'Work Hours Date Range',
+            value=[max(date_range[0], date_range[1] - timedelta(days=6)), date_range[1]],
+            min_value=date_range[0],
+            max_value=date_range[1],
+            key='work_hours_range'
+        )
+        hours_dates = list(hours_range) if hours_range else [date_range[0], date_range[1]]
+        hours_range = [hours_dates[0], hours_dates[-1]]
+
+        if not st.checkbox('Compute work hours', key='work_hours_enabled'):
+            st.info("Tick 'Compute work hours' to summarise the selected days")
+        else:
+            with st.spinner('Summarising work hours...'):
+                summary = load_work_hours(hours_range[0], hours_range[1], tuple(selected_roles),
+                                          attendance_store.attendance_version(),
+                                          get_setting('LATE_AFTER', '09:00'),
+                                          get_setting('LEAVE_BEFORE', '17:00'))
+            if not summary.empty:
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Average Hours", f"{summary['Worked_Hours'].mean():.1f}")
+                with col2:
+                    st.metric("Late Arrivals", int(summary['Late'].sum()))
+                with col3:
+                    st.metric("Left Early", int(summary['Left_Early'].sum()))
+                with col4:
+                    st.metric("Missing Clock-Outs", int(summary['Missing_Clock_Out'].sum()))
+
+                avg_hours = summary.groupby('Name')['Worked_Hours'].mean().sort_values(ascending=False)
+
+                fig, ax = plt.subplots(figsize=(10, 6))
+                avg_hours.plot(kind='bar', ax=ax)
+                plt.title('Average Daily Work Hours per Employee')
+                plt.xlabel('Employee')
+                plt.ylabel('Hours')
+                plt.xticks(rotation=45)
+                st.pyplot(fig)
+
+                st.subheader("Daily Summary")
+                page_size = page_size_control('work_hours')
+                page_df = frame_pager('work_hours', summary, page_size,
+                                      filters=(tuple(hours_range), tuple(selected_roles)))
+                st.dataframe(format_datetime_columns(page_df, ['First_In', 'Last_Out']), hide_index=True)
+
+                export_controls('work_hours', lambda: frame_chunks(summary), f"work_hours_{hours_range[0]}_{hours_range[1]}")
+            else:
+                st.warning("No data available for selected filters")
+
     # Refresh button
     if st.button('Refresh Data'):
         st.experimental_rerun()
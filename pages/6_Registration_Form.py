@@ -46,8 +46,11 @@ else:
             st.error(f"Access Denied: Invalid {reason}")
             st.stop()
             
-        # Init registration form
-        registration_form = face_utils.RegistrationForm()
+        # Init registration form once per session; its embedding buffer
+        # must survive reruns while the camera is capturing
+        if 'registration_form' not in st.session_state:
+            st.session_state.registration_form = face_utils.RegistrationForm()
+        registration_form = st.session_state.registration_form
 
         # Personal Information
         col1, col2 = st.columns(2)
@@ -93,15 +96,10 @@ else:
         )
         role = roles[role_number]
 
-        # Collect facial embedding
+        # Collect facial embeddings into the form's buffer
         def video_callback_func(frame):
             img = frame.to_ndarray(format="bgr24")
-            reg_img, embedding = registration_form.get_embedding(img)
-
-            if embedding is not None:
-                with open('face_embedding.txt', mode='ab') as f:
-                    face_utils.np.savetxt(f,embedding)
-
+            reg_img, _ = registration_form.get_embedding(img)
             return av.VideoFrame.from_ndarray(reg_img, format="bgr24")
 
         webrtc_streamer(key="registration", 
@@ -131,10 +129,24 @@ else:
                     st.error('Invalid file number format')
                 elif return_val == 'false first_name':
                     st.error('Invalid first name format')
-                elif return_val == 'No face_embedding.txt':
+                elif return_val == 'No face samples':
                     st.error('Face embedding not found. Please try capturing your face again.')
+                elif return_val == 'Low quality samples':
+                    st.error('Not enough clear, front-facing face samples. Please face the camera '
+                             'in good light, hold still and capture again.')
                 else:
                     st.error(f"Registration failed: {return_val}")
 
+                # Template quality of this attempt
+                report = registration_form.report
+                if return_val in (True, 'Low quality samples') and report:
+                    st.write("Template quality:")
+                    col_kept, col_quality, col_consistency = st.columns(3)
+                    col_kept.metric("Samples used", f"{report['kept']} / {report['captured']}")
+                    col_quality.metric("Mean sample quality", f"{report['mean_quality']:.2f}")
+                    col_consistency.metric("Consistency", f"{report['consistency']:.2f}")
+                    st.caption(f"Rejected: {report['low_quality']} low quality, "
+                               f"{report['outliers']} outliers")
+
     if __name__ == "__main__":
         main()
\ No newline at end of file
@@ -1,8 +1,10 @@
 from utils.config import configure_app
 configure_app()
 import streamlit as st
-import face_utils
-import pandas as pd
+from utils import attendance_store
+from datetime import timedelta
+from utils.export import export_controls
+from utils.pagination import cursor_pager, format_datetime_columns, page_size_control, reset_pages
 import redis
 from auth import authenticator
 from streamlit_modal import Modal
@@ -39,10 +41,6 @@ else:
     # Import check requirements after initial Streamlit setup
     import check_requirements
 
-    # Redis connection
-    r = face_utils.r
-    REDIS_KEY = 'attendance:logs'
-
     def main():
         # Network verification first
         access_granted, reason = check_requirements.ip_address_range_verification()
@@ -51,84 +49,47 @@ else:
             st.error(f"Access Denied: Invalid {reason}")
             st.stop()
             
-        def get_full_attendance_data():
-            """Retrieve complete attendance data from Redis"""
-            with st.spinner('Retrieving Data from Database ...'):
-                logs = face_utils.load_logs(name=REDIS_KEY)
-                
-                # Decode and process the logs
-                cleaned_logs = []
-                for log in logs:
-                    if isinstance(log, bytes):
-                        log = log.decode('utf-8')
-                    log = log.strip("b'")
-                    parts = log.split('@')
-                    if len(parts) >= 4:  # Updated to handle logs with zone information
-                        file_name_role = parts[0]
-                        role = parts[1]
-                        timestamp = parts[2]
-                        Clock_In_Out = parts[3]
-                        zone = parts[4] if len(parts) > 4 else 'Lagos Zone 2'  # Default zone if not specified
-                        
-                        try:
-                            file_no, name = file_name_role.split('.', 1)
-                            cleaned_logs.append({
-                                'File No.': file_no,
-                                'Name': name,
-                                'Role': role,
-                                'Zone': zone,
-                                'Timestamp': timestamp,
-                                'Clock_In_Out': Clock_In_Out,
-                                'Redis_Key': log  # Store the original Redis key for deletion
-                            })
-                        except:
-                            continue
-
-                if cleaned_logs:
-                    df = pd.DataFrame(cleaned_logs)
-                    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-                    return df
-                return pd.DataFrame()
-
-        # Initialize session state
-        if 'attendance_df' not in st.session_state:
-            st.session_state.attendance_df = get_full_attendance_data()
-
-        # Create filter controls
-        col_filter1, col_filter2 = st.columns(2)
+        # Create filter controls (bounds come from the day index, not the data)
+        min_date, max_date = attendance_store.attendance_date_bounds()
+        col_filter1, col_filter2, col_filter3 = st.columns(3)
         with col_filter1:
-            # Date range filter
-            min_date = None
-            max_date = None
-            if not st.session_state.attendance_df.empty:
-                min_date = st.session_state.attendance_df['Timestamp'].min().date()
-                max_date = st.session_state.attendance_df['Timestamp'].max().date()
-            
+            # Date range filter, defaulting to the last week on record
             date_range = st.date_input(
                 'Filter by Date Range',
-                value=[min_date, max_date] if min_date and max_date else None,
+                value=[max(min_date, max_date - timedelta(days=6)), max_date] if min_date and max_date else None,
                 min_value=min_date,
                 max_value=max_date
             )
         
         with col_filter2:
             # Zone filter
-            all_zones = ['All Zones']
-            if not st.session_state.attendance_df.empty:
-                if 'Zone' in st.session_state.attendance_df.columns:
-                    all_zones.extend(sorted(st.session_state.attendance_df['Zone'].unique().tolist()))
-            
+            all_zones = ['All Zones'] + attendance_store.attendance_zones()
             selected_zone = st.selectbox('Filter by Zone', all_zones)
 
-        # Apply filters to the data
-        filtered_df = st.session_state.attendance_df.copy()
-        if date_range and len(date_range) == 2:
-            filtered_df = filtered_df[
-                (filtered_df['Timestamp'].dt.date >= date_range[0]) & 
-                (filtered_df['Timestamp'].dt.date <= date_range[1])
-            ]
-        if selected_zone != 'All Zones':
-            filtered_df = filtered_df[filtered_df['Zone'] == selected_zone]
+        with col_filter3:
+            # Staff filter (comma-separated file numbers)
+            staff_filter = st.text_input('Filter by File No.', help="Comma-separated file numbers")
+            selected_staff = [file_no.strip() for file_no in staff_filter.split(',') if file_no.strip()]
+
+        # A half-picked range (one date) queries just that day
+        dates = list(date_range) if date_range else []
+        query = dict(
+            start=dates[0] if dates else None,
+            end=dates[-1] if dates else None,
+            zones=None if selected_zone == 'All Zones' else [selected_zone],
+            staff=selected_staff or None
+        )
+
+        def fetch_page(cursor, page_size):
+            """Retrieve one page of the attendance records matching the filters from Redis"""
+            with st.spinner('Retrieving Data from Database ...'):
+                return attendance_store.page_attendance(cursor=cursor, page_size=page_size, **query)
+
+        # Only the current page is fetched and sent to the browser
+        page_size = page_size_control('attendance')
+        filtered_df = cursor_pager('attendance', fetch_page, page_size,
+                                   filters=(tuple(dates), selected_zone, tuple(selected_staff)))
+        total_records = attendance_store.count_attendance(**query)
 
         # Add delete checkboxes if there's data
         if not filtered_df.empty:
@@ -136,7 +97,7 @@ else:
 
             # Display editable dataframe with checkboxes
             edited_df = st.data_editor(
-                filtered_df.drop(columns=['Redis_Key']),  # Don't show Redis key to users
+                format_datetime_columns(filtered_df.drop(columns=['Event_ID']), ['Timestamp']),  # Don't show event IDs to users
                 column_config={
                     "Delete": st.column_config.CheckboxColumn(
                         "Select to delete",
@@ -150,7 +111,8 @@ else:
             )
 
             # Get selected records for deletion
-            to_delete = filtered_df[edited_df['Delete']]['Redis_Key'].tolist()
+            selected = filtered_df[edited_df['Delete'].to_numpy()]
+            to_delete = selected['Event_ID'].tolist()
 
             # Confirmation modal for individual deletions
             if len(to_delete) > 0:
@@ -164,21 +126,16 @@ else:
                 with delete_modal.container():
                     st.warning(f"Are you sure you want to delete {len(to_delete)} attendance record(s)?")
                     st.write("Selected records:")
-                    for record_key in to_delete:
-                        parts = record_key.split('@')
-                        st.write(f"- {parts[0]} (Time: {parts[2]}, Action: {parts[3]})")
+                    for record in selected.itertuples(index=False):
+                        st.write(f"- {record[0]}.{record[1]} (Time: {record.Timestamp}, Action: {record.Clock_In_Out})")
                     
                     col1, col2 = st.columns(2)
                     with col1:
                         if st.button("✅ Confirm Delete", key="confirm_delete"):
-                            success_count = 0
-                            for record_key in to_delete:
-                                if r.lrem(REDIS_KEY, 0, record_key):  # Remove all matching entries
-                                    success_count += 1
+                            success_count = attendance_store.delete_attendance_events(to_delete)
                             
                             if success_count > 0:
                                 st.success(f"Deleted {success_count} attendance record(s)")
-                                st.session_state.attendance_df = get_full_attendance_data()
                                 st.rerun()
                             delete_modal.close()
                             
@@ -191,22 +148,19 @@ else:
 
         with col1:
             if st.button("🔄 Refresh Logs"):
-                st.session_state.attendance_df = get_full_attendance_data()
+                reset_pages('attendance')
                 st.rerun()
 
         with col2:
-            # Download CSV with filtered data
-            if not filtered_df.empty:
-                csv_data = filtered_df.drop(columns=['Redis_Key', 'Delete']).to_csv(index=False).encode('utf-8')
-                st.download_button(
-                    label="📥 Download as CSV",
-                    data=csv_data,
-                    file_name="attendance_logs.csv",
-                    mime="text/csv",
-                    help="Download filtered attendance data"
+            # Export all filtered data, streamed from Redis in chunks when asked for
+            if total_records:
+                export_controls(
+                    'attendance',
+                    lambda: (chunk.drop(columns=['Event_ID']) for chunk in attendance_store.iter_attendance(**query)),
+                    'attendance_logs'
                 )
             else:
-                st.button("📥 Download as CSV", disabled=True)
+                st.button("📥 Download", disabled=True)
 
         with col3:
             if st.button("🧹 Clear Database", type="primary"):
@@ -224,9 +178,9 @@ else:
                     col1, col2 = st.columns(2)
                     with col1:
                         if st.button("✅ Confirm", type="primary"):
-                            r.delete(REDIS_KEY)
+                            attendance_store.clear_attendance()
                             st.success("Attendance logs cleared!")
-                            st.session_state.attendance_df = pd.DataFrame()
+                            reset_pages('attendance')
                             st.rerun()
                             clear_modal.close()
                     with col2:
@@ -234,25 +188,25 @@ else:
                             clear_modal.close()
 
         # Display status
-        if filtered_df.empty:
+        if not total_records:
             st.info("No attendance records found" + 
                    (f" in {selected_zone}" if selected_zone != 'All Zones' else "") + 
                    (f" between {date_range[0]} and {date_range[1]}" if date_range and len(date_range) == 2 else ""))
         else:
-            st.success(f"Showing {len(filtered_df)} attendance records" + 
+            st.success(f"Showing {len(filtered_df)} of {total_records} attendance records" + 
                       (f" in {selected_zone}" if selected_zone != 'All Zones' else "") + 
                       (f" between {date_range[0]} and {date_range[1]}" if date_range and len(date_range) == 2 else ""))
 
         # Show summary statistics if data exists
-        if not filtered_df.empty:
+        if total_records:
             st.subheader("Summary Statistics")
             col_sum1, col_sum2, col_sum3 = st.columns(3)
             with col_sum1:
-                st.metric("Total Records", len(filtered_df))
+                st.metric("Total Records", total_records)
             with col_sum2:
-                st.metric("Unique Employees", filtered_df['Name'].nunique())
+                st.metric("Employees on Page", filtered_df['Name'].nunique())
             with col_sum3:
-                st.metric("Zones Represented", filtered_df['Zone'].nunique())
+                st.metric("Zones on Page", filtered_df['Zone'].nunique())
 
     if __name__ == "__main__":
         main()
\ No newline at end of file
@@ -5,6 +5,9 @@ import pandas as pd
 import redis
 from datetime import datetime
 import face_utils
+from utils.export import export_controls
+from utils.redis_store import delete_keys, scan_keys
+from utils.pagination import cursor_pager, format_datetime_columns, page_size_control
 from auth import authenticator
 
 from utils.session import init_auth_session_keys
@@ -35,28 +38,29 @@ else:
     authenticator.logout('Logout', 'sidebar')
     st.write(f'Welcome *{st.session_state["name"]}*')
 
-    # Connect to Redis
-    r = face_utils.r
-
-    def load_duty_reports():
-        """Load all duty reports from Redis"""
-        reports = []
-        for key in r.scan_iter("duty_report:*"):
-            report_data = r.hgetall(key)
-            decoded_report = {k.decode('utf-8'): v.decode('utf-8') for k, v in report_data.items()}
-            reports.append(decoded_report)
-        return pd.DataFrame(reports)
+    def filter_duty_reports(reports_df, role_filter, shift_filter, date_filter):
+        """Apply the page filters to an export chunk of duty reports"""
+        reports_df = reports_df.assign(timestamp=pd.to_datetime(reports_df['timestamp'], format='ISO8601', errors='coerce'))
+        if role_filter != 'All':
+            reports_df = reports_df[reports_df['officer_role'] == role_filter]
+        if shift_filter != 'All':
+            reports_df = reports_df[reports_df['duty_type'] == shift_filter]
+        if date_filter is not None:
+            reports_df = reports_df[reports_df['timestamp'].dt.date == date_filter]
+        return reports_df
+
+    def export_duty_reports(role_filter, shift_filter, date_filter):
+        """Stream the filtered duty reports from Redis chunk by chunk for export"""
+        for chunk in face_utils.iter_duty_reports():
+            chunk = filter_duty_reports(chunk, role_filter, shift_filter, date_filter)
+            if not chunk.empty:
+                yield chunk
 
     def clear_duty_reports():
         """Clear all duty reports from Redis"""
-        for key in r.scan_iter("duty_report:*"):
-            r.delete(key)
+        delete_keys(scan_keys(f"{face_utils.DUTY_REPORT_PREFIX}*"))
         st.success("All duty reports have been cleared!")
 
-    def convert_to_csv(df):
-        """Convert DataFrame to CSV"""
-        return df.to_csv(index=False).encode('utf-8')
-
     # Main function
     def main():
         # Network verification first
@@ -66,62 +70,58 @@ else:
             st.error(f"Access Denied: Invalid {reason}")
             st.stop()
 
-        # Load data
-        with st.spinner('Loading duty reports...'):
-            reports_df = load_duty_reports()
-
-        if not reports_df.empty:
-            # Convert timestamp and sort
-            reports_df['timestamp'] = pd.to_datetime(reports_df['timestamp'])
-            reports_df.sort_values('timestamp', ascending=False, inplace=True)
-
-            # Filters
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                role_filter = st.selectbox(
-                    'Filter by Officer Role',
-                    ['All'] + sorted(reports_df['officer_role'].unique())
-                )
-            with col2:
-                shift_filter = st.selectbox(
-                    'Filter by Duty Shift',
-                    ['All'] + sorted(reports_df['duty_type'].unique())
-                )
-            with col3:
-                date_filter = st.selectbox(
-                    'Filter by Date',
-                    ['All'] + sorted(reports_df['timestamp'].dt.date.astype(str).unique())
+        # Filter options are fixed, so no reports are loaded to build them
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            role_filter = st.selectbox(
+                'Filter by Officer Role',
+                ['All'] + face_utils.DUTY_ROLES
+            )
+        with col2:
+            shift_filter = st.selectbox(
+                'Filter by Duty Shift',
+                ['All'] + face_utils.DUTY_SHIFTS
+            )
+        with col3:
+            date_filter = st.date_input('Filter by Date', value=None)
+
+        def fetch_page(cursor, page_size):
+            """Read one page of the filtered duty reports from Redis"""
+            with st.spinner('Loading duty reports...'):
+                return face_utils.page_duty_reports(
+                    cursor=cursor,
+                    page_size=page_size,
+                    officer_role=None if role_filter == 'All' else role_filter,
+                    duty_type=None if shift_filter == 'All' else shift_filter,
+                    day=date_filter
                 )
 
-            # Apply filters
-            if role_filter != 'All':
-                reports_df = reports_df[reports_df['officer_role'] == role_filter]
-            if shift_filter != 'All':
-                reports_df = reports_df[reports_df['duty_type'] == shift_filter]
-            if date_filter != 'All':
-                reports_df = reports_df[reports_df['timestamp'].dt.date.astype(str) == date_filter]
+        # Only the current page is read from Redis (a day filter narrows the key scan)
+        page_size = page_size_control('duty_reports')
+        page_df = cursor_pager('duty_reports', fetch_page, page_size,
+                               filters=(role_filter, shift_filter, date_filter))
 
-            # Display reports
+        if not page_df.empty:
             st.dataframe(
-                reports_df.style.format({'timestamp': lambda x: x.strftime('%Y-%m-%d %H:%M:%S')}),
-                height=600
+                format_datetime_columns(page_df, ['timestamp']),
+                height=600,
+                hide_index=True
             )
 
             # Download and management
             col1, col2 = st.columns(2)
             with col1:
-                st.download_button(
-                    label="Download as CSV",
-                    data=convert_to_csv(reports_df),
-                    file_name=f"duty_reports_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime='text/csv'
+                export_controls(
+                    'duty_reports',
+                    lambda: export_duty_reports(role_filter, shift_filter, date_filter),
+                    f"duty_reports_{datetime.now().strftime('%Y%m%d')}"
                 )
             with col2:
                 if st.button('Clear All Reports', type="primary"):
                     clear_duty_reports()
                     st.experimental_rerun()
         else:
-            st.info("No duty reports found in the system")
+            st.info("No duty reports match the filters")
 
     if __name__ == "__main__":
         main()
\ No newline at end of file
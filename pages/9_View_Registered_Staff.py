@@ -6,6 +6,7 @@ import pandas as pd
 import numpy as np
 from streamlit_modal import Modal
 from auth import authenticator
+from utils.pagination import frame_pager, page_size_control
 
 from utils.session import init_auth_session_keys
 init_auth_session_keys()
@@ -75,12 +76,14 @@ else:
         else:
             filtered_df = st.session_state.display_df.copy()
 
-        # Add delete checkboxes
-        filtered_df['Delete'] = False
+        # Add delete checkboxes to the current page only
+        page_size = page_size_control('staff')
+        page_df = frame_pager('staff', filtered_df, page_size, filters=selected_zone).copy()
+        page_df['Delete'] = False
 
         # Display editable dataframe with checkboxes
         edited_df = st.data_editor(
-            filtered_df,
+            page_df,
             column_config={
                 "Delete": st.column_config.CheckboxColumn(
                     "Select to delete",
@@ -118,15 +121,16 @@ else:
                 col1, col2 = st.columns(2)
                 with col1:
                     if st.button("✅ Confirm Delete", key="confirm_delete"):
-                        success_count = 0
+                        redis_keys = []
                         for staff in to_delete:
                             # Get the full record to construct the correct Redis key
                             full_record = st.session_state.full_staff_df[
                                 st.session_state.full_staff_df['File No. Name'] == staff
                             ].iloc[0]
-                            redis_key = f"{staff}@{full_record['Role']}@{full_record['Zone']}"
-                            if r.hdel(REDIS_KEY, redis_key):
-                                success_count += 1
+                            redis_keys.append(f"{staff}@{full_record['Role']}@{full_record['Zone']}")
+                        
+                        # Deletes and records the change so kiosk galleries drop these staff
+                        success_count = face_utils.remove_staff(redis_keys, name=REDIS_KEY)
                         
                         if success_count > 0:
                             st.success(f"Deleted {success_count} staff member(s)")
@@ -178,7 +182,7 @@ else:
                     col1, col2 = st.columns(2)
                     with col1:
                         if st.button("✅ Confirm", type="primary"):
-                            r.delete(REDIS_KEY)
+                            face_utils.clear_staff_register(name=REDIS_KEY)
                             st.success("Database cleared!")
                             st.session_state.full_staff_df = pd.DataFrame(columns=['File No. Name', 'Role', 'Zone', 'Facial_features'])
                             st.session_state.display_df = pd.DataFrame(columns=['File No. Name', 'Role', 'Zone'])
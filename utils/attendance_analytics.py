@@ -0,0 +1,123 @@
+# utils/attendance_analytics.py
+import numpy as np
+import pandas as pd
+
+NS_PER_DAY = 24 * 3600 * 10**9
+NS_PER_HOUR = 3600 * 10**9
+
+SUMMARY_COLUMNS = ['Date', 'File No.', 'Name', 'Role', 'Zone', 'First_In', 'Last_Out', 'Worked_Hours',
+                   'Sessions', 'Late', 'Left_Early', 'Missing_Clock_Out', 'Missing_Clock_In']
+
+
+def _time_of_day_ns(value):
+    """'HH:MM' (or 'HH:MM:SS') -> nanoseconds since midnight"""
+    return pd.Timedelta(value if value.count(':') == 2 else f"{value}:00").value
+
+
+def daily_work_summary(events, late_after='09:00', leave_before='17:00'):
+    """
+    Pair Clock_In/Clock_Out events per staff member per day and summarise each day.
+
+    Events are sorted once with np.lexsort by (staff, day, time). A Clock_In
+    immediately followed by a Clock_Out of the same staff member and day forms
+    a worked session; per-day totals are then taken with bincount/reduceat
+    over the group boundaries, so there is no per-person Python loop.
+
+    Args:
+        events (pd.DataFrame): Columns File No., Name, Role, Zone, Timestamp, Clock_In_Out
+            (as returned by attendance_store.query_attendance)
+        late_after (str): First clock-in after this time of day ('HH:MM') is late
+        leave_before (str): Last clock-out before this time of day ('HH:MM') is early
+
+    Returns:
+        pd.DataFrame: One row per staff member per day with columns SUMMARY_COLUMNS:
+            - First_In / Last_Out: first Clock_In and last Clock_Out (NaT if none)
+            - Worked_Hours: total of the paired sessions, Sessions: number of pairs
+            - Late, Left_Early: against late_after / leave_before
+            - Missing_Clock_Out: a Clock_In with no Clock_Out after it that day
+            - Missing_Clock_In: a Clock_Out with no Clock_In before it that day
+    """
+    if events.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    timestamps = events['Timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    staff, _ = pd.factorize(events['File No.'])
+    days = timestamps // NS_PER_DAY
+    order = np.lexsort((timestamps, days, staff))
+
+    timestamps, staff, days = timestamps[order], staff[order], days[order]
+    actions = events['Clock_In_Out'].to_numpy()[order]
+    is_in = actions == 'Clock_In'
+    is_out = actions == 'Clock_Out'
+
+    # Group = one staff member on one day; rows are contiguous after the sort
+    boundary = np.empty(len(order), dtype=bool)
+    boundary[0] = True
+    boundary[1:] = (staff[1:] != staff[:-1]) | (days[1:] != days[:-1])
+    group = np.cumsum(boundary) - 1
+    starts = np.flatnonzero(boundary)
+    n_groups = len(starts)
+
+    # Session = Clock_In whose next event in the same group is a Clock_Out
+    paired = is_in[:-1] & is_out[1:] & ~boundary[1:]
+    pair_groups = group[:-1][paired]
+    durations = (timestamps[1:] - timestamps[:-1])[paired]
+    worked = np.bincount(pair_groups, weights=durations, minlength=n_groups)
+    sessions = np.bincount(pair_groups, minlength=n_groups)
+
+    paired_in = np.append(paired, False)
+    paired_out = np.insert(paired, 0, False)
+    missing_out = np.bincount(group[is_in & ~paired_in], minlength=n_groups) > 0
+    missing_in = np.bincount(group[is_out & ~paired_out], minlength=n_groups) > 0
+
+    no_time = np.iinfo(np.int64)
+    first_in = np.minimum.reduceat(np.where(is_in, timestamps, no_time.max), starts)
+    last_out = np.maximum.reduceat(np.where(is_out, timestamps, no_time.min), starts)
+    has_in = first_in != no_time.max
+    has_out = last_out != no_time.min
+    day_start = days[starts] * NS_PER_DAY
+    first_in = np.where(has_in, first_in, no_time.min)  # int64 min is NaT
+    last_out = np.where(has_out, last_out, no_time.min)
+
+    rows = order[starts]
+    return pd.DataFrame({
+        'Date': day_start.astype('datetime64[ns]').astype('datetime64[D]').astype(object),
+        'File No.': events['File No.'].to_numpy()[rows],
+        'Name': events['Name'].to_numpy()[rows],
+        'Role': events['Role'].to_numpy()[rows],
+        'Zone': events['Zone'].to_numpy()[rows],
+        'First_In': first_in.astype('datetime64[ns]'),
+        'Last_Out': last_out.astype('datetime64[ns]'),
+        'Worked_Hours': np.round(worked / NS_PER_HOUR, 2),
+        'Sessions': sessions,
+        'Late': has_in & (np.where(has_in, first_in - day_start, 0) > _time_of_day_ns(late_after)),
+        'Left_Early': has_out & (np.where(has_out, last_out - day_start, 0) < _time_of_day_ns(leave_before)),
+        'Missing_Clock_Out': missing_out,
+        'Missing_Clock_In': missing_in,
+    }, columns=SUMMARY_COLUMNS)
+
+
+def summarise_chunks(chunks, **params):
+    """
+    Stream daily_work_summary over event chunks that arrive one day after
+    another (as from attendance_store.iter_attendance), holding back the last day
+    of each chunk until the next chunk shows whether it continues.
+
+    Args:
+        chunks (iterable): Event DataFrames ordered by day (either direction)
+        params: Passed to daily_work_summary
+
+    Yields:
+        pd.DataFrame: Summary rows for each completed run of days
+    """
+    pending = None
+    for chunk in chunks:
+        if pending is not None:
+            chunk = pd.concat([pending, chunk], ignore_index=True)
+        days = chunk['Timestamp'].dt.normalize()
+        last_day = days.iloc[-1]
+        done, pending = chunk[days != last_day], chunk[days == last_day]
+        if not done.empty:
+            yield daily_work_summary(done, **params)
+    if pending is not None and not pending.empty:
+        yield daily_work_summary(pending, **params)
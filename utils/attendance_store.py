@@ -0,0 +1,833 @@
+# utils/attendance_store.py
+import collections
+import itertools
+import logging
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pandas as pd
+import redis
+
+from utils.config import get_setting
+from utils.redis_store import delete_keys, get_redis, hgetall_many, hmget_many, run_script, scan_keys
+from utils.staff_register import DEFAULT_ZONE
+
+logger = logging.getLogger(__name__)
+
+# Per-staff "last action today" state: one hash per day keyed by file number,
+# holding "<action>@<timestamp>"; it expires after the day is over
+ATTENDANCE_STATE_PREFIX = 'attendance:today'
+ATTENDANCE_STATE_TTL = 2 * 24 * 3600
+
+# Status codes returned for each clock event
+ACTION_DUPLICATE = 0
+ACTION_RECORDED = 1
+
+# Attendance store: one hash per event (attendance:event:<id>) indexed by a
+# sorted set per day (attendance:day:<date>, scored by epoch seconds), per day
+# and zone (attendance:day:<date>:zone:<zone>) and per staff member
+# (attendance:staff:<file_no>), plus a sorted set of the days that have events
+# (scored by date ordinal) and the set of zones seen. attendance:version is
+# bumped by every change so readers can tell when cached frames are stale.
+# attendance:agg:<date> hashes hold the dashboard counters for a day:
+#   'z|<zone>|<role>|<hour>|<action>' and 's|<zone>|<role>|<name>|<action>'
+#
+# The clock-event and delete scripts derive event, zone and staff key names
+# inside Lua (event ids only exist once the script has allocated them), so
+# not every key they touch is declared in KEYS. The store therefore needs a
+# single Redis node (optionally with replicas); Redis Cluster is not supported.
+ATTENDANCE_EVENT_PREFIX = 'attendance:event:'
+ATTENDANCE_DAY_PREFIX = 'attendance:day:'
+ATTENDANCE_STAFF_PREFIX = 'attendance:staff:'
+ATTENDANCE_DAYS_KEY = 'attendance:days'
+ATTENDANCE_ZONES_KEY = 'attendance:zones'
+ATTENDANCE_SEQ_KEY = 'attendance:seq'
+ATTENDANCE_VERSION_KEY = 'attendance:version'
+ATTENDANCE_AGG_PREFIX = 'attendance:agg:'
+# Statuses of an already applied batch (attendance:batch:<id>:<date>), so a
+# writer retrying a batch whose first attempt did execute gets the original
+# statuses back instead of ACTION_DUPLICATE
+ATTENDANCE_BATCH_PREFIX = 'attendance:batch:'
+ATTENDANCE_BATCH_TTL = 3600
+LEGACY_ATTENDANCE_KEY = 'attendance:logs'
+
+# Validates each event against the day's state and, if accepted, updates the
+# state and stores the event with all of its index entries in the same call.
+# With a batch key (KEYS[8]) a replayed batch returns its stored statuses.
+_CLOCK_EVENT_LUA = """
+if KEYS[8] then
+    local applied = redis.call('GET', KEYS[8])
+    if applied then
+        return cjson.decode(applied)
+    end
+end
+local ttl = tonumber(ARGV[1])
+local day, day_score, prefix, staff_prefix = ARGV[2], ARGV[3], ARGV[4], ARGV[5]
+local batch_ttl = ARGV[6]
+local statuses = {}
+local recorded = false
+for i = 7, #ARGV, 8 do
+    local file_no, action, timestamp = ARGV[i], ARGV[i + 1], ARGV[i + 2]
+    local name, role, zone, epoch, hour = ARGV[i + 3], ARGV[i + 4], ARGV[i + 5], ARGV[i + 6], ARGV[i + 7]
+    local last = redis.call('HGET', KEYS[1], file_no)
+    if last and string.match(last, '^[^@]+') == action then
+        statuses[#statuses + 1] = 0
+    else
+        redis.call('HSET', KEYS[1], file_no, action .. '@' .. timestamp)
+        local id = tostring(redis.call('INCR', KEYS[4]))
+        redis.call('HSET', prefix .. id, 'file_no', file_no, 'name', name, 'role', role,
+                   'zone', zone, 'timestamp', timestamp, 'action', action, 'day', day)
+        redis.call('ZADD', KEYS[2], epoch, id)
+        redis.call('ZADD', KEYS[2] .. ':zone:' .. zone, epoch, id)
+        redis.call('ZADD', staff_prefix .. file_no, epoch, id)
+        redis.call('SADD', KEYS[5], zone)
+        redis.call('HINCRBY', KEYS[7], 'z|' .. zone .. '|' .. role .. '|' .. hour .. '|' .. action, 1)
+        redis.call('HINCRBY', KEYS[7], 's|' .. zone .. '|' .. role .. '|' .. name .. '|' .. action, 1)
+        statuses[#statuses + 1] = 1
+        recorded = true
+    end
+end
+if recorded then
+    redis.call('ZADD', KEYS[3], day_score, day)
+    redis.call('INCR', KEYS[6])
+end
+redis.call('EXPIRE', KEYS[1], ttl)
+if KEYS[8] then
+    redis.call('SET', KEYS[8], cjson.encode(statuses), 'EX', batch_ttl)
+end
+return statuses
+"""
+
+def attendance_state_key(day=None):
+    """
+    Redis key of the per-staff state hash for a day.
+    
+    Args:
+        day (date): Day of the state (default today)
+        
+    Returns:
+        str: e.g. 'attendance:today:2024-05-01'
+    """
+    day = day or datetime.now().date()
+    return f"{ATTENDANCE_STATE_PREFIX}:{day.isoformat()}"
+
+def staff_file_number(name):
+    """Extract the file number from a 'file.first.last' staff name"""
+    return name.split('.', 1)[0]
+
+def record_clock_events(events, batch_id=None):
+    """
+    Validate and record clock events atomically, one script call per day,
+    all pipelined into a single round trip.
+    
+    Args:
+        events (list): (name, role, zone, current_time, action) tuples; current_time
+            is an ISO timestamp string as produced by str(datetime.now())
+        batch_id (str): Client-generated id making the call idempotent: calling
+            again with the same id and events within ATTENDANCE_BATCH_TTL seconds
+            returns the first call's statuses without recording anything
+            
+    Returns:
+        list: ACTION_RECORDED or ACTION_DUPLICATE per event, in order
+    """
+    by_day = {}
+    for i, event in enumerate(events):
+        by_day.setdefault(datetime.fromisoformat(event[3]).date(), []).append(i)
+    
+    pipe = get_redis().pipeline(transaction=False)
+    for day, indices in by_day.items():
+        args = [ATTENDANCE_STATE_TTL, day.isoformat(), day.toordinal(),
+                ATTENDANCE_EVENT_PREFIX, ATTENDANCE_STAFF_PREFIX, ATTENDANCE_BATCH_TTL]
+        for i in indices:
+            name, role, zone, current_time, action = events[i]
+            moment = datetime.fromisoformat(current_time)
+            args += [staff_file_number(name), action, current_time, name, role, zone,
+                     moment.timestamp(), moment.hour]
+        keys = [attendance_state_key(day), attendance_day_key(day), ATTENDANCE_DAYS_KEY, ATTENDANCE_SEQ_KEY,
+                ATTENDANCE_ZONES_KEY, ATTENDANCE_VERSION_KEY, f"{ATTENDANCE_AGG_PREFIX}{day.isoformat()}"]
+        if batch_id is not None:
+            keys.append(f"{ATTENDANCE_BATCH_PREFIX}{batch_id}:{day.isoformat()}")
+        run_script(_CLOCK_EVENT_LUA, keys=keys, args=args, client=pipe)
+    
+    statuses = [None] * len(events)
+    for indices, replies in zip(by_day.values(), pipe.execute()):
+        for i, status in zip(indices, replies):
+            statuses[i] = int(status)
+    return statuses
+
+def _attendance_frame(records):
+    """
+    Build the attendance DataFrame from decoded event hashes.
+    
+    Args:
+        records (list): Dicts with event_id, name, role, zone, timestamp and action
+        
+    Returns:
+        pd.DataFrame: Columns File No., Name, Role, Zone, Timestamp, Clock_In_Out, Event_ID
+    """
+    columns = ['File No.', 'Name', 'Role', 'Zone', 'Timestamp', 'Clock_In_Out', 'Event_ID']
+    if not records:
+        return pd.DataFrame(columns=columns).astype({'Timestamp': 'datetime64[ns]'})
+    
+    df = pd.DataFrame.from_records(records)
+    file_name = df['name'].str.split('.', n=1, expand=True).reindex(columns=[0, 1])
+    return pd.DataFrame({
+        'File No.': file_name[0],
+        'Name': file_name[1].fillna(file_name[0]),
+        'Role': df['role'],
+        'Zone': df['zone'].fillna(DEFAULT_ZONE),
+        'Timestamp': pd.to_datetime(df['timestamp'], format='ISO8601', errors='coerce'),
+        'Clock_In_Out': df['action'],
+        'Event_ID': df['event_id'],
+    }, columns=columns).dropna(subset=['Timestamp'])
+
+def attendance_day_key(day, zone=None):
+    """
+    Key of the sorted set indexing a day's events, optionally for one zone.
+    
+    Args:
+        day (date | str): Day or its ISO string
+        zone (str): Restrict to events recorded in this zone
+        
+    Returns:
+        str: 'attendance:day:<date>' or 'attendance:day:<date>:zone:<zone>'
+    """
+    day = day if isinstance(day, str) else day.isoformat()
+    if zone is None:
+        return f"{ATTENDANCE_DAY_PREFIX}{day}"
+    return f"{ATTENDANCE_DAY_PREFIX}{day}:zone:{zone}"
+
+def _day_epoch(day, end=False):
+    """Epoch seconds at the start of `day` (or of the next day if `end`)"""
+    if end:
+        day = day + timedelta(days=1)
+    return datetime.combine(day, datetime.min.time()).timestamp()
+
+def _attendance_id_groups(start=None, end=None, zones=None, staff=None, before=None):
+    """
+    Yield the (score, event_id) pairs matching a filter, newest first.
+    
+    Staff filters read the per-staff index by score range in one group;
+    otherwise one group is read per day (from the per-day or per-day-and-zone
+    indexes), newest day first, so callers that stop early never touch older days.
+    
+    Args:
+        start, end, zones, staff: As for query_attendance
+        before (tuple): Only yield pairs strictly older than this (score, event_id) cursor
+        
+    Yields:
+        list: (score, event_id) pairs of one group, sorted newest first
+    """
+    r = get_redis()
+    pipe = r.pipeline(transaction=False)
+    
+    if staff:
+        low = _day_epoch(start) if start else '-inf'
+        high = f"({_day_epoch(end, end=True)}" if end else '+inf'
+        for file_no in staff:
+            pipe.zrangebyscore(f"{ATTENDANCE_STAFF_PREFIX}{file_no}", low, high, withscores=True)
+        groups = [pipe]
+    else:
+        last = end.toordinal() if end else float('inf')
+        if before is not None:
+            last = min(last, datetime.fromtimestamp(before[0]).date().toordinal())
+        days = r.zrevrangebyscore(ATTENDANCE_DAYS_KEY, last, start.toordinal() if start else '-inf')
+        groups = ([attendance_day_key(day.decode(), zone) for zone in (zones or [None])] for day in days)
+    
+    for group in groups:
+        if group is not pipe:
+            for key in group:
+                pipe.zrange(key, 0, -1, withscores=True)
+        pairs = sorted(((score, int(event_id)) for rows in pipe.execute() for event_id, score in rows), reverse=True)
+        if before is not None:
+            pairs = [pair for pair in pairs if pair < tuple(before)]
+        yield pairs
+
+def _fetch_attendance_events(pairs):
+    """Fetch the event hashes of (score, event_id) pairs as decoded record dicts, in order"""
+    records = []
+    for (score, event_id), event in zip(pairs, hgetall_many([f"{ATTENDANCE_EVENT_PREFIX}{i}" for _, i in pairs])):
+        if event:
+            record = {k.decode('utf-8'): v.decode('utf-8') for k, v in event.items()}
+            record['event_id'] = str(event_id)
+            record['score'] = score
+            records.append(record)
+    return records
+
+def query_attendance(start=None, end=None, zones=None, staff=None):
+    """
+    Load the attendance events matching a filter, reading only the indexes it needs.
+    
+    Staff filters read the per-staff index by score range; otherwise the
+    per-day (or per-day-and-zone) indexes of the days in range are read.
+    Only the matching event hashes are fetched.
+    
+    Args:
+        start (date): First day to include (default: earliest)
+        end (date): Last day to include (default: latest)
+        zones (list): Zones to include (default: all)
+        staff (list): File numbers to include (default: all)
+        
+    Returns:
+        pd.DataFrame: Columns File No., Name, Role, Zone, Timestamp, Clock_In_Out, Event_ID,
+            sorted by Timestamp (newest first)
+    """
+    pairs = [pair for group in _attendance_id_groups(start, end, zones, staff) for pair in group]
+    df = _attendance_frame(_fetch_attendance_events(pairs))
+    if staff and zones:
+        df = df[df['Zone'].isin(zones)]
+    return df.sort_values('Timestamp', ascending=False, ignore_index=True)
+
+def page_attendance(start=None, end=None, zones=None, staff=None, cursor=None, page_size=50):
+    """
+    Load one page of the attendance events matching a filter, newest first.
+    
+    Pages are addressed by cursor rather than offset: only the indexes of the
+    days the page spans are read, and only the page's event hashes are fetched.
+    
+    Args:
+        start, end, zones, staff: As for query_attendance
+        cursor (tuple): next_cursor of the previous page (None for the first page)
+        page_size (int): Events per page
+        
+    Returns:
+        tuple: (page_df, next_cursor) where next_cursor is None on the last page
+    """
+    pairs = itertools.chain.from_iterable(_attendance_id_groups(start, end, zones, staff, before=cursor))
+    
+    # One extra event tells whether another page follows
+    records = []
+    while len(records) <= page_size:
+        batch = list(itertools.islice(pairs, page_size + 1 - len(records)))
+        if not batch:
+            break
+        records += [record for record in _fetch_attendance_events(batch)
+                    if not (staff and zones) or record.get('zone') in zones]
+    
+    next_cursor = None
+    if len(records) > page_size:
+        records = records[:page_size]
+        next_cursor = (records[-1]['score'], int(records[-1]['event_id']))
+    return _attendance_frame(records), next_cursor
+
+def iter_attendance(start=None, end=None, zones=None, staff=None, chunk_size=5000):
+    """
+    Stream the attendance events matching a filter as DataFrame chunks, newest first.
+    
+    At most one day's event IDs and `chunk_size` event hashes are held at a
+    time, so memory stays flat whatever the date range.
+    
+    Args:
+        start, end, zones, staff: As for query_attendance
+        chunk_size (int): Events per chunk
+        
+    Yields:
+        pd.DataFrame: Chunks with the columns of query_attendance
+    """
+    pairs = itertools.chain.from_iterable(_attendance_id_groups(start, end, zones, staff))
+    while True:
+        batch = list(itertools.islice(pairs, chunk_size))
+        if not batch:
+            return
+        df = _attendance_frame(_fetch_attendance_events(batch))
+        if staff and zones:
+            df = df[df['Zone'].isin(zones)]
+        if not df.empty:
+            yield df
+
+def count_attendance(start=None, end=None, zones=None, staff=None):
+    """
+    Count the attendance events matching a filter from the index sizes.
+    
+    Args:
+        start, end, zones, staff: As for query_attendance
+        
+    Returns:
+        int: Number of matching events
+    """
+    r = get_redis()
+    if staff and zones:
+        pairs = next(_attendance_id_groups(start, end, None, staff))
+        zone_fields = [zone for zone, in hmget_many([f"{ATTENDANCE_EVENT_PREFIX}{i}" for _, i in pairs], 'zone')]
+        return sum(1 for zone in zone_fields if zone is not None and zone.decode('utf-8') in zones)
+    
+    pipe = r.pipeline(transaction=False)
+    if staff:
+        low = _day_epoch(start) if start else '-inf'
+        high = f"({_day_epoch(end, end=True)}" if end else '+inf'
+        for file_no in staff:
+            pipe.zcount(f"{ATTENDANCE_STAFF_PREFIX}{file_no}", low, high)
+    else:
+        days = r.zrangebyscore(ATTENDANCE_DAYS_KEY,
+                               start.toordinal() if start else '-inf',
+                               end.toordinal() if end else '+inf')
+        for day in days:
+            for zone in (zones or [None]):
+                pipe.zcard(attendance_day_key(day.decode(), zone))
+    return sum(pipe.execute())
+
+def attendance_zones():
+    """
+    Zones that have attendance events.
+    
+    Returns:
+        list: Sorted zone names
+    """
+    return sorted(zone.decode('utf-8') for zone in get_redis().smembers(ATTENDANCE_ZONES_KEY))
+
+def attendance_date_bounds():
+    """
+    First and last day that have attendance events.
+    
+    Returns:
+        tuple: (first_date, last_date), or (None, None) if there are no events
+    """
+    r = get_redis()
+    first = r.zrange(ATTENDANCE_DAYS_KEY, 0, 0)
+    last = r.zrange(ATTENDANCE_DAYS_KEY, -1, -1)
+    if not first:
+        return None, None
+    return (datetime.strptime(first[0].decode(), '%Y-%m-%d').date(),
+            datetime.strptime(last[0].decode(), '%Y-%m-%d').date())
+
+def attendance_version():
+    """
+    Counter bumped by every attendance write, delete, clear and migration.
+    
+    Returns:
+        int: Current version, usable as a cache key for derived results
+    """
+    return int(get_redis().get(ATTENDANCE_VERSION_KEY) or 0)
+
+# Deletes events by ID with all of their index entries; drops days left empty
+# from the day index and clears a deleted latest action from the day's state
+# (key names are built in Lua, see the Redis Cluster note above)
+_DELETE_EVENTS_LUA = """
+local prefix, day_prefix, staff_prefix, state_prefix, agg_prefix = ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5]
+local function decrement(key, field)
+    if redis.call('HINCRBY', key, field, -1) <= 0 then
+        redis.call('HDEL', key, field)
+    end
+end
+local deleted = 0
+for i = 6, #ARGV do
+    local id = ARGV[i]
+    local event = redis.call('HMGET', prefix .. id, 'day', 'zone', 'file_no', 'action', 'timestamp', 'name', 'role')
+    local day, zone, file_no, action = event[1], event[2], event[3], event[4]
+    if day then
+        local hour = tostring(tonumber(string.sub(event[5], 12, 13)))
+        decrement(agg_prefix .. day, 'z|' .. zone .. '|' .. event[7] .. '|' .. hour .. '|' .. action)
+        decrement(agg_prefix .. day, 's|' .. zone .. '|' .. event[7] .. '|' .. event[6] .. '|' .. action)
+        local day_key = day_prefix .. day
+        redis.call('ZREM', day_key, id)
+        redis.call('ZREM', day_key .. ':zone:' .. zone, id)
+        redis.call('ZREM', staff_prefix .. file_no, id)
+        redis.call('DEL', prefix .. id)
+        if redis.call('ZCARD', day_key) == 0 then
+            redis.call('ZREM', KEYS[1], day)
+        end
+        local state_key = state_prefix .. ':' .. day
+        if redis.call('HGET', state_key, file_no) == event[4] .. '@' .. event[5] then
+            redis.call('HDEL', state_key, file_no)
+        end
+        deleted = deleted + 1
+    end
+end
+if deleted > 0 then
+    redis.call('INCR', KEYS[2])
+end
+return deleted
+"""
+
+def delete_attendance_events(event_ids):
+    """
+    Delete attendance events by ID, together with their index entries, in one scripted call.
+    
+    Args:
+        event_ids (list): Event IDs as returned in the Event_ID column
+        
+    Returns:
+        int: Number of events deleted (unknown IDs are ignored)
+    """
+    if not event_ids:
+        return 0
+    args = [ATTENDANCE_EVENT_PREFIX, ATTENDANCE_DAY_PREFIX, ATTENDANCE_STAFF_PREFIX, ATTENDANCE_STATE_PREFIX,
+            ATTENDANCE_AGG_PREFIX]
+    deleted = int(run_script(_DELETE_EVENTS_LUA, keys=[ATTENDANCE_DAYS_KEY, ATTENDANCE_VERSION_KEY],
+                              args=args + list(event_ids)))
+    return deleted
+
+def clear_attendance():
+    """Delete every attendance event and index, and the per-day last-action state"""
+    keys = (scan_keys(f"{ATTENDANCE_EVENT_PREFIX}*") + scan_keys(f"{ATTENDANCE_DAY_PREFIX}*")
+            + scan_keys(f"{ATTENDANCE_STAFF_PREFIX}*") + scan_keys(f"{ATTENDANCE_AGG_PREFIX}*")
+            + scan_keys(f"{ATTENDANCE_STATE_PREFIX}:*") + scan_keys(f"{ATTENDANCE_BATCH_PREFIX}*"))
+    delete_keys(keys + [ATTENDANCE_DAYS_KEY, ATTENDANCE_ZONES_KEY])
+    get_redis().incr(ATTENDANCE_VERSION_KEY)
+
+def load_attendance_aggregates(start=None, end=None):
+    """
+    Read the per-day dashboard counters for a date range.
+    
+    One small hash is read per day, so the cost depends on the range and
+    the number of staff, not on how many events were recorded.
+    
+    Args:
+        start (date): First day to include (default: earliest)
+        end (date): Last day to include (default: latest)
+        
+    Returns:
+        tuple: (counts, staff) DataFrames where
+            - counts: Date, Zone, Role, Hour, Clock_In_Out, Count
+            - staff: Date, Zone, Role, File No., Name, Clock_In_Out, Count
+    """
+    r = get_redis()
+    days = r.zrangebyscore(ATTENDANCE_DAYS_KEY,
+                           start.toordinal() if start else '-inf',
+                           end.toordinal() if end else '+inf')
+    pipe = r.pipeline(transaction=False)
+    for day in days:
+        pipe.hgetall(f"{ATTENDANCE_AGG_PREFIX}{day.decode()}")
+    
+    rows = [(day.decode(), field.decode('utf-8'), int(count))
+            for day, counters in zip(days, pipe.execute() if days else []) for field, count in counters.items()]
+    fields = pd.DataFrame(rows, columns=['Date', 'Field', 'Count'])
+    fields['Date'] = pd.to_datetime(fields['Date']).dt.date
+    parts = fields['Field'].str.split('|', n=4, expand=True).reindex(columns=range(5))
+    
+    is_count = (parts[0] == 'z').to_numpy()
+    counts = pd.DataFrame({
+        'Date': fields['Date'][is_count], 'Zone': parts[1][is_count], 'Role': parts[2][is_count],
+        'Hour': parts[3][is_count].astype(int), 'Clock_In_Out': parts[4][is_count], 'Count': fields['Count'][is_count],
+    }).reset_index(drop=True)
+    
+    is_staff = (parts[0] == 's').to_numpy()
+    file_name = parts[3][is_staff].str.split('.', n=1, expand=True).reindex(columns=[0, 1])
+    staff = pd.DataFrame({
+        'Date': fields['Date'][is_staff], 'Zone': parts[1][is_staff], 'Role': parts[2][is_staff],
+        'File No.': file_name[0], 'Name': file_name[1].fillna(file_name[0]),
+        'Clock_In_Out': parts[4][is_staff], 'Count': fields['Count'][is_staff],
+    }).reset_index(drop=True)
+    
+    return counts, staff
+
+def rebuild_attendance_aggregates(chunk_size=5000):
+    """
+    Recompute every per-day dashboard counter from the stored events.
+    
+    Args:
+        chunk_size (int): Events per chunk read from the store
+        
+    Returns:
+        int: Number of events counted
+    """
+    r = get_redis()
+    delete_keys(scan_keys(f"{ATTENDANCE_AGG_PREFIX}*"))
+    
+    total = 0
+    for chunk in iter_attendance(chunk_size=chunk_size):
+        day = chunk['Timestamp'].dt.date.astype(str)
+        name = chunk['File No.'] + '.' + chunk['Name']
+        zone_fields = ('z|' + chunk['Zone'] + '|' + chunk['Role'] + '|'
+                       + chunk['Timestamp'].dt.hour.astype(str) + '|' + chunk['Clock_In_Out'])
+        staff_fields = 's|' + chunk['Zone'] + '|' + chunk['Role'] + '|' + name + '|' + chunk['Clock_In_Out']
+        
+        pipe = r.pipeline(transaction=False)
+        for fields in (zone_fields, staff_fields):
+            for (key, field), count in pd.DataFrame({'key': day, 'field': fields}).value_counts().items():
+                pipe.hincrby(f"{ATTENDANCE_AGG_PREFIX}{key}", field, int(count))
+        pipe.execute()
+        total += len(chunk)
+    
+    r.incr(ATTENDANCE_VERSION_KEY)
+    return total
+
+def _parse_legacy_log(log):
+    """
+    Parse a legacy 'name@role@timestamp@action' (optionally with a zone) log entry.
+    
+    Returns:
+        tuple: (name, role, zone, timestamp, action), or None if malformed
+    """
+    parts = log.split('@')
+    if len(parts) == 4:
+        name, role, timestamp, action = parts
+        zone = DEFAULT_ZONE
+    elif len(parts) == 5:
+        # Both name@role@zone@timestamp@action and name@role@timestamp@action@zone exist
+        try:
+            datetime.fromisoformat(parts[2])
+            name, role, timestamp, action, zone = parts
+        except ValueError:
+            name, role, zone, timestamp, action = parts
+    else:
+        return None
+    
+    action = action.strip().replace('-', '_').title()
+    try:
+        datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    return name, role, zone, timestamp, action
+
+# Seeds a day's last-action state from migrated events: an entry is only
+# written if the staff member has no state yet or an older one
+_SEED_STATE_LUA = """
+for i = 2, #ARGV, 3 do
+    local file_no, action, timestamp = ARGV[i], ARGV[i + 1], ARGV[i + 2]
+    local last = redis.call('HGET', KEYS[1], file_no)
+    if not last or string.match(last, '@(.*)$') < timestamp then
+        redis.call('HSET', KEYS[1], file_no, action .. '@' .. timestamp)
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 0
+"""
+
+def migrate_attendance_logs(batch_size=1000, legacy_key=LEGACY_ATTENDANCE_KEY):
+    """
+    Copy the legacy attendance:logs list into the event store.
+    
+    The list is first renamed to a '<legacy_key>:migrating' snapshot, so
+    anything still LPUSHing to the legacy key cannot shift the offsets being
+    migrated (entries pushed meanwhile land in a new list; run again to
+    migrate those). The snapshot is read in batches, each written in one
+    MULTI/EXEC transaction together with the offset reached
+    ('<legacy_key>:progress'), so an interrupted run resumes from the
+    snapshot after the last completed batch. Today's entries also seed
+    today's last-action state, so a staff member who clocked in before the
+    migration cannot clock in again. When done the snapshot is renamed to
+    '<legacy_key>:migrated' (with a timestamp suffix if that exists already).
+    
+    Args:
+        batch_size (int): Entries per LRANGE/pipeline batch
+        legacy_key (str): Legacy list key
+        
+    Returns:
+        dict: Counts of 'migrated' and 'skipped' (malformed) entries in this run
+    """
+    r = get_redis()
+    snapshot_key = f"{legacy_key}:migrating"
+    progress_key = f"{legacy_key}:progress"
+    if not r.exists(snapshot_key):
+        if not r.exists(legacy_key):
+            return {'migrated': 0, 'skipped': 0}
+        pipe = r.pipeline(transaction=True)
+        pipe.rename(legacy_key, snapshot_key)
+        pipe.delete(progress_key)
+        pipe.execute()
+    
+    total = r.llen(snapshot_key)
+    today = datetime.now().date()
+    migrated = skipped = 0
+    
+    for start in range(int(r.get(progress_key) or 0), total, batch_size):
+        entries = [_parse_legacy_log(log.decode('utf-8')) for log in r.lrange(snapshot_key, start, start + batch_size - 1)]
+        skipped += sum(1 for entry in entries if entry is None)
+        entries = [entry for entry in entries if entry is not None]
+        if not entries:
+            r.set(progress_key, start + batch_size)
+            continue
+        
+        last_id = r.incrby(ATTENDANCE_SEQ_KEY, len(entries))
+        latest_today = {}
+        pipe = r.pipeline(transaction=True)
+        for event_id, (name, role, zone, timestamp, action) in zip(range(last_id - len(entries) + 1, last_id + 1), entries):
+            moment = datetime.fromisoformat(timestamp)
+            day = moment.date()
+            file_no = staff_file_number(name)
+            pipe.hset(f"{ATTENDANCE_EVENT_PREFIX}{event_id}", mapping={
+                'file_no': file_no, 'name': name, 'role': role, 'zone': zone,
+                'timestamp': timestamp, 'action': action, 'day': day.isoformat()
+            })
+            pipe.zadd(attendance_day_key(day), {event_id: moment.timestamp()})
+            pipe.zadd(attendance_day_key(day, zone), {event_id: moment.timestamp()})
+            pipe.zadd(f"{ATTENDANCE_STAFF_PREFIX}{file_no}", {event_id: moment.timestamp()})
+            pipe.zadd(ATTENDANCE_DAYS_KEY, {day.isoformat(): day.toordinal()})
+            pipe.sadd(ATTENDANCE_ZONES_KEY, zone)
+            pipe.hincrby(f"{ATTENDANCE_AGG_PREFIX}{day.isoformat()}", f"z|{zone}|{role}|{moment.hour}|{action}", 1)
+            pipe.hincrby(f"{ATTENDANCE_AGG_PREFIX}{day.isoformat()}", f"s|{zone}|{role}|{name}|{action}", 1)
+            if day == today and timestamp > latest_today.get(file_no, ('', ''))[1]:
+                latest_today[file_no] = (action, timestamp)
+        if latest_today:
+            args = [ATTENDANCE_STATE_TTL]
+            for file_no, (action, timestamp) in latest_today.items():
+                args += [file_no, action, timestamp]
+            run_script(_SEED_STATE_LUA, keys=[attendance_state_key(today)], args=args, client=pipe)
+        pipe.set(progress_key, start + batch_size)
+        pipe.execute()
+        migrated += len(entries)
+    
+    if not r.renamenx(snapshot_key, f"{legacy_key}:migrated"):
+        r.rename(snapshot_key, f"{legacy_key}:migrated:{datetime.now():%Y%m%d%H%M%S}")
+    r.delete(progress_key)
+    r.incr(ATTENDANCE_VERSION_KEY)
+    
+    return {'migrated': migrated, 'skipped': skipped}
+
+class AttendanceWriter:
+    """
+    Write-behind queue for clock events so video callbacks never wait on Redis.
+    
+    Events are put on a bounded in-process queue and drained by a daemon
+    thread that writes them in pipelined batches, retrying with exponential
+    backoff when Redis is unreachable. Each batch carries a client-generated
+    id, so a retry after a write that did reach Redis (e.g. the reply was
+    lost) returns the original statuses rather than ACTION_DUPLICATE.
+    stats() is logged every `stats_interval` seconds while events flow.
+    
+    Attributes:
+        queue (queue.Queue): Pending (event, callback) items
+        batch_size (int): Maximum events per write
+        max_retries (int): Attempts per batch before it is dropped (at least one)
+        backoff (float): Initial retry delay in seconds (doubled per attempt)
+        max_backoff (float): Maximum retry delay in seconds
+        stats_interval (float): Minimum seconds between stats log lines
+        dropped (int): Events rejected because the queue was full
+        written (int): Events written (recorded or rejected as duplicates)
+        failed (int): Events lost after exhausting retries
+    """
+    
+    def __init__(self, maxsize=1000, batch_size=100, max_retries=5, backoff=0.5, max_backoff=10.0,
+                 stats_interval=300.0):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats_interval = stats_interval
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._stats_lock = threading.Lock()  # counters are updated from session and writer threads
+        self._logged_at = time.monotonic()
+        self._latencies = collections.deque(maxlen=100)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+    
+    def submit(self, events, callback=None):
+        """
+        Queue clock events without blocking.
+        
+        Args:
+            events (list): (name, role, zone, current_time, action) tuples
+            callback (callable): Called from the writer thread as callback(name, action, status)
+            
+        Returns:
+            int: Number of events queued (the rest were dropped because the queue is full)
+        """
+        self._ensure_thread()
+        queued = 0
+        for event in events:
+            try:
+                self.queue.put_nowait((event, callback))
+                queued += 1
+            except queue.Full:
+                pass
+        if queued < len(events):
+            self._count('dropped', len(events) - queued)
+            logger.warning("Attendance queue full, dropped %d event(s)", len(events) - queued)
+        return queued
+    
+    def stats(self):
+        """
+        Current queue depth, counters and write latency.
+        
+        Returns:
+            dict: queue_depth, dropped, written, failed, last_write_ms, avg_write_ms
+        """
+        latencies = list(self._latencies)
+        with self._stats_lock:
+            dropped, written, failed = self.dropped, self.written, self.failed
+        return {
+            'queue_depth': self.queue.qsize(),
+            'dropped': dropped,
+            'written': written,
+            'failed': failed,
+            'last_write_ms': latencies[-1] if latencies else None,
+            'avg_write_ms': sum(latencies) / len(latencies) if latencies else None,
+        }
+    
+    def _count(self, counter, n):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + n)
+    
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._thread_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='attendance-writer', daemon=True)
+                    self._thread.start()
+    
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception:
+                # Never let one bad batch stop the writer thread
+                self._count('failed', len(batch))
+                logger.exception("Dropping %d attendance event(s) after an unexpected error", len(batch))
+            if time.monotonic() - self._logged_at >= self.stats_interval:
+                self._logged_at = time.monotonic()
+                logger.info("Attendance writer stats: %s", self.stats())
+    
+    def _write(self, batch):
+        """Write one batch, retrying with backoff; the batch id makes replays idempotent"""
+        events = [event for event, _ in batch]
+        batch_id = uuid.uuid4().hex
+        delay = self.backoff
+        attempts = max(self.max_retries, 1)
+        
+        for attempt in range(1, attempts + 1):
+            try:
+                start = time.perf_counter()
+                statuses = record_clock_events(events, batch_id=batch_id)
+                self._latencies.append((time.perf_counter() - start) * 1000)
+                break
+            except redis.RedisError as e:
+                # Connection loss, timeouts, READONLY during failover, OOM: all may clear up
+                if attempt == attempts:
+                    self._count('failed', len(batch))
+                    logger.error("Dropping %d attendance event(s) after %d attempts: %s", len(batch), attempt, e)
+                    return
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+        
+        self._count('written', len(batch))
+        for (event, callback), status in zip(batch, statuses):
+            if callback is not None:
+                name, _, _, _, action = event
+                try:
+                    callback(name, action, status)
+                except Exception:
+                    logger.exception("Attendance write callback failed for %s", name)
+
+_attendance_writer = None
+_attendance_writer_lock = threading.Lock()
+
+def get_attendance_writer():
+    """
+    Return the process-wide AttendanceWriter, sized by the ATTENDANCE_QUEUE_SIZE setting
+    and logging its stats every ATTENDANCE_STATS_LOG_SECONDS.
+    
+    Returns:
+        AttendanceWriter: Shared write-behind queue
+    """
+    global _attendance_writer
+    if _attendance_writer is None:
+        with _attendance_writer_lock:
+            if _attendance_writer is None:
+                _attendance_writer = AttendanceWriter(
+                    maxsize=get_setting('ATTENDANCE_QUEUE_SIZE', 1000, int),
+                    stats_interval=get_setting('ATTENDANCE_STATS_LOG_SECONDS', 300.0, float)
+                )
+    return _attendance_writer
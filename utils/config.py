@@ -1,5 +1,6 @@
 # utils/config.py
 import base64
+import os
 import streamlit as st
 from pathlib import Path
 
@@ -20,4 +21,25 @@ def configure_app():
         page_icon=favicon if favicon else ":bust_in_silhouette:",
         layout="wide",
         initial_sidebar_state="expanded"
-    )
\ No newline at end of file
+    )
+
+def get_setting(key, default=None, cast=None):
+    """
+    Read a setting from Streamlit secrets, falling back to environment variables.
+
+    Args:
+        key (str): Setting name, e.g. 'FACE_INDEX_BACKEND'
+        default: Value returned when the setting is not defined anywhere
+        cast (callable): Optional conversion applied to the raw value (e.g. int)
+
+    Returns:
+        The setting value, or `default`
+    """
+    try:
+        value = st.secrets[key]
+    except Exception:
+        value = os.environ.get(key)
+
+    if value is None:
+        return default
+    return cast(value) if cast else value
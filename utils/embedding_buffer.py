@@ -0,0 +1,148 @@
+# utils/embedding_buffer.py
+import os
+import threading
+import weakref
+
+import numpy as np
+
+from utils.staff_register import EMBEDDING_DIM
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class EmbeddingBuffer:
+    """
+    Preallocated float32 ring buffer of face embeddings for one capture session.
+
+    Appends from the video callback thread write a row in place; once
+    `capacity` samples are held the oldest are overwritten, or, for samples
+    appended with a quality score, the lowest-scoring one if the new sample
+    scores higher. With a `spill_path` the rows live in a .npy memory map
+    instead of process memory; the file is deleted by close() or, failing
+    that, when the buffer is garbage collected (e.g. its session ends).
+
+    Attributes:
+        capacity (int): Maximum samples kept
+        dim (int): Embedding dimension
+        spill_path (str): .npy file backing the buffer, or None for memory only
+        total (int): Samples appended since the last clear (may exceed capacity)
+    """
+
+    def __init__(self, capacity=200, dim=EMBEDDING_DIM, spill_path=None):
+        self.capacity = capacity
+        self.dim = dim
+        self.spill_path = spill_path
+        self.total = 0
+        self._lock = threading.Lock()
+        if spill_path:
+            self._rows = np.lib.format.open_memmap(spill_path, mode='w+', dtype=np.float32, shape=(capacity, dim))
+            self._remove_spill = weakref.finalize(self, _remove_file, spill_path)
+        else:
+            self._rows = np.zeros((capacity, dim), dtype=np.float32)
+        self._quality = np.zeros(capacity, dtype=np.float32)
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, embedding, quality=None):
+        """
+        Copy one embedding into the next free slot.
+
+        Args:
+            embedding (np.array): Embedding of length dim
+            quality (float): Optional sample quality; when the buffer is full a
+                scored sample replaces the lowest-scoring one (or is dropped if
+                it scores no higher), an unscored one overwrites the oldest
+        """
+        with self._lock:
+            if self.total < self.capacity or quality is None:
+                slot = self.total % self.capacity
+            else:
+                slot = int(np.argmin(self._quality))
+                if quality <= self._quality[slot]:
+                    return
+            self._rows[slot] = embedding
+            self._quality[slot] = 0 if quality is None else quality
+            self.total += 1
+
+    def samples(self):
+        """
+        Copy of the held samples.
+
+        Returns:
+            np.ndarray: float32 array of shape (len(self), dim)
+        """
+        with self._lock:
+            return np.array(self._rows[:len(self)])
+
+    def qualities(self):
+        """Copy of the quality scores of the held samples, parallel to samples() (0 if unscored)"""
+        with self._lock:
+            return self._quality[:len(self)].copy()
+
+    def mean(self):
+        """Mean embedding of the held samples (None if empty)"""
+        samples = self.samples()
+        return samples.mean(axis=0).astype(np.float32) if len(samples) else None
+
+    def clear(self):
+        """Forget all samples (the spill file is zeroed, not removed)"""
+        with self._lock:
+            self._rows[:] = 0
+            self._quality[:] = 0
+            self.total = 0
+
+    def close(self):
+        """Release the buffer and delete its spill file; the buffer cannot be used afterwards"""
+        if self.spill_path:
+            self._rows = None
+            self._remove_spill()
+
+
+class RunningMeanBuffer:
+    """
+    Running sum and count of face embeddings for one verification session.
+
+    Only the mean is needed to verify a person, so samples are folded into a
+    float64 sum as they arrive and memory stays at one embedding however long
+    the camera runs. At most `max_samples` samples are counted; later ones are
+    ignored until the buffer is cleared.
+
+    Attributes:
+        max_samples (int): Samples counted before the buffer stops accepting
+        dim (int): Embedding dimension
+        count (int): Samples counted since the last clear
+    """
+
+    def __init__(self, max_samples=200, dim=EMBEDDING_DIM):
+        self.max_samples = max_samples
+        self.dim = dim
+        self.count = 0
+        self._sum = np.zeros(dim, dtype=np.float64)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def append(self, embedding):
+        """Add one embedding to the running sum (ignored once max_samples are counted)"""
+        with self._lock:
+            if self.count < self.max_samples:
+                self._sum += embedding
+                self.count += 1
+
+    def mean(self):
+        """Mean embedding of the counted samples (None if empty)"""
+        with self._lock:
+            return (self._sum / self.count).astype(np.float32) if self.count else None
+
+    def clear(self):
+        """Forget all samples"""
+        with self._lock:
+            self._sum[:] = 0
+            self.count = 0
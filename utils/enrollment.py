@@ -0,0 +1,125 @@
+# utils/enrollment.py
+import cv2
+import numpy as np
+
+# A face this many pixels across (shorter bbox side) or larger scores full marks for size
+FULL_SIZE_PX = 112
+# Laplacian variance of the 112x112 grey face crop that scores full marks for sharpness
+FULL_SHARPNESS = 150.0
+# Nose offset from the eye midline, in eye distances, at which yaw scores zero
+MAX_YAW = 0.5
+# Frontal faces have the nose about halfway between the eyes and the mouth;
+# a deviation of this much (as a fraction of eye-to-mouth height) scores zero
+FRONTAL_PITCH = 0.5
+MAX_PITCH_DEVIATION = 0.3
+
+
+def _clip01(value):
+    return float(min(max(value, 0.0), 1.0))
+
+
+def sample_quality(frame, face):
+    """
+    Score one detected face for use as an enrollment sample.
+
+    The score is the product of four factors in [0, 1], so a sample that is
+    bad on any one of them (blurry, small, turned away, weak detection) ranks low.
+
+    Args:
+        frame (np.array): BGR frame the face was detected in
+        face: insightface Face with 'bbox', 'kps' (5 landmarks) and 'det_score'
+
+    Returns:
+        dict: 'det_score', 'size', 'pose', 'sharpness' factors and their product 'score'
+    """
+    x1, y1, x2, y2 = face['bbox'][:4]
+    h, w = frame.shape[:2]
+    x1, y1 = int(max(0, x1)), int(max(0, y1))
+    x2, y2 = int(min(w, x2)), int(min(h, y2))
+
+    size = _clip01(min(x2 - x1, y2 - y1) / FULL_SIZE_PX)
+
+    sharpness = 0.0
+    if x2 > x1 and y2 > y1:
+        crop = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+        crop = cv2.resize(crop, (FULL_SIZE_PX, FULL_SIZE_PX), interpolation=cv2.INTER_AREA)
+        sharpness = _clip01(cv2.Laplacian(crop, cv2.CV_64F).var() / FULL_SHARPNESS)
+
+    pose = 1.0
+    kps = face.get('kps')
+    if kps is not None:
+        # insightface landmark order: left eye, right eye, nose, left mouth, right mouth
+        left_eye, right_eye, nose, left_mouth, right_mouth = np.asarray(kps, dtype=np.float32)[:5]
+        eye_mid = (left_eye + right_eye) / 2
+        mouth_mid = (left_mouth + right_mouth) / 2
+        eye_dist = np.linalg.norm(right_eye - left_eye)
+        face_height = mouth_mid[1] - eye_mid[1]
+        if eye_dist > 0 and face_height > 0:
+            yaw = abs(nose[0] - eye_mid[0]) / eye_dist
+            pitch = abs((nose[1] - eye_mid[1]) / face_height - FRONTAL_PITCH)
+            pose = _clip01(1 - yaw / MAX_YAW) * _clip01(1 - pitch / MAX_PITCH_DEVIATION)
+        else:
+            pose = 0.0
+
+    det_score = _clip01(face.get('det_score', 1.0))
+    return {
+        'det_score': det_score,
+        'size': size,
+        'pose': pose,
+        'sharpness': sharpness,
+        'score': det_score * size * pose * sharpness,
+    }
+
+
+def _unit_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def build_template(embeddings, qualities, top_k=20, min_quality=0.2, max_distance=0.35, min_samples=5):
+    """
+    Turn captured enrollment samples into an L2-normalized identity template.
+
+    Samples below `min_quality` are dropped and the best `top_k` by quality are
+    kept. Kept samples further than `max_distance` (cosine) from their
+    element-wise median are rejected as outliers, e.g. another person passing
+    the camera or a bad crop. The template is the normalized mean of the rest.
+
+    Args:
+        embeddings (np.array): Captured embeddings of shape (N, dim)
+        qualities (np.array): Quality score of each sample (sample_quality 'score')
+        top_k (int): Maximum samples kept after quality ranking
+        min_quality (float): Samples scoring below this are never used
+        max_distance (float): Cosine distance to the median beyond which a sample is an outlier
+        min_samples (int): Inliers needed to build a template
+
+    Returns:
+        tuple: (template, report) where template is a float32 unit vector (None if
+            fewer than min_samples inliers remain) and report a dict with 'captured',
+            'low_quality', 'outliers', 'kept', 'mean_quality' and 'consistency'
+            (mean cosine similarity of the kept samples to the template)
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    qualities = np.asarray(qualities, dtype=np.float32)
+    report = {'captured': len(embeddings), 'low_quality': 0, 'outliers': 0, 'kept': 0,
+              'mean_quality': 0.0, 'consistency': 0.0}
+
+    usable = np.flatnonzero(qualities >= min_quality)
+    report['low_quality'] = len(embeddings) - len(usable)
+    best = usable[np.argsort(-qualities[usable], kind='stable')[:top_k]]
+    if best.size == 0:
+        return None, report
+
+    samples = _unit_rows(embeddings[best])
+    median = _unit_rows(np.median(samples, axis=0))
+    inliers = (1 - samples @ median) <= max_distance
+    report['outliers'] = int((~inliers).sum())
+    samples, kept_quality = samples[inliers], qualities[best][inliers]
+    report['kept'] = len(samples)
+    if len(samples) < max(min_samples, 1):
+        return None, report
+
+    template = _unit_rows(samples.mean(axis=0)).astype(np.float32)
+    report['mean_quality'] = round(float(kept_quality.mean()), 3)
+    report['consistency'] = round(float((samples @ template).mean()), 3)
+    return template, report
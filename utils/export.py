@@ -0,0 +1,146 @@
+# utils/export.py
+import gzip
+import io
+import tempfile
+
+import streamlit as st
+
+# format -> (mime type, file suffix)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'csv.gz': ('application/gzip', '.csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+}
+
+
+def _aligned(chunks):
+    """Reindex every chunk to the columns of the first, so all chunks share one layout"""
+    columns = None
+    for chunk in chunks:
+        if columns is None:
+            columns = list(chunk.columns)
+        yield chunk.reindex(columns=columns)
+
+
+def write_csv(chunks, fileobj):
+    """
+    Write DataFrame chunks to a binary file object as one CSV, header first.
+
+    Args:
+        chunks (iterable): DataFrames; columns follow the first chunk
+        fileobj: Writable binary file object
+
+    Returns:
+        int: Number of rows written
+    """
+    rows = 0
+    text = io.TextIOWrapper(fileobj, encoding='utf-8', newline='', write_through=True)
+    try:
+        for chunk in _aligned(chunks):
+            chunk.to_csv(text, index=False, header=rows == 0)
+            rows += len(chunk)
+    finally:
+        text.detach()
+    return rows
+
+
+def write_csv_gz(chunks, fileobj):
+    """write_csv through gzip compression"""
+    with gzip.GzipFile(fileobj=fileobj, mode='wb') as compressed:
+        return write_csv(chunks, compressed)
+
+
+def write_parquet(chunks, fileobj):
+    """
+    Write DataFrame chunks as one Parquet file, one row group per chunk,
+    with the optional `pyarrow` package.
+
+    Returns:
+        int: Number of rows written
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)") from e
+
+    rows = 0
+    writer = None
+    try:
+        for chunk in _aligned(chunks):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(fileobj, table.schema)
+            else:
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+EXPORT_WRITERS = {
+    'csv': write_csv,
+    'csv.gz': write_csv_gz,
+    'parquet': write_parquet,
+}
+
+
+def export_chunks(chunks, fmt, fileobj):
+    """
+    Stream DataFrame chunks into a file object in the given format.
+
+    Args:
+        chunks (iterable): DataFrames, e.g. from attendance_store.iter_attendance
+        fmt (str): One of EXPORT_FORMATS
+        fileobj: Writable binary file object
+
+    Returns:
+        int: Number of rows written
+    """
+    if fmt not in EXPORT_WRITERS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {sorted(EXPORT_WRITERS)}")
+    return EXPORT_WRITERS[fmt](chunks, fileobj)
+
+
+def frame_chunks(df, chunk_size=5000):
+    """Split an in-memory DataFrame into chunks for export_chunks"""
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def export_controls(key, make_chunks, file_stem):
+    """
+    Export format picker and a button that streams the export to a temporary
+    file on disk and offers it for download.
+
+    Args:
+        key (str): Widget key prefix, unique on the page
+        make_chunks (callable): Returns the DataFrame chunks to export
+        file_stem (str): Download file name without suffix
+    """
+    col_format, col_button = st.columns(2)
+    with col_format:
+        fmt = st.selectbox('Export format', list(EXPORT_FORMATS), key=f'{key}_export_format')
+    with col_button:
+        if st.button("📄 Prepare export", key=f'{key}_prepare_export'):
+            # download_button reads the file into the session before returning,
+            # so the temporary file can be closed (and deleted) right after
+            with tempfile.TemporaryFile() as spooled:
+                try:
+                    with st.spinner('Exporting ...'):
+                        rows = export_chunks(make_chunks(), fmt, spooled)
+                except ImportError as e:
+                    st.error(str(e))
+                    return
+                spooled.seek(0)
+                mime, suffix = EXPORT_FORMATS[fmt]
+                st.download_button(
+                    label=f"📥 Download {rows} rows",
+                    data=spooled,
+                    file_name=f"{file_stem}{suffix}",
+                    mime=mime,
+                    key=f'{key}_download_export'
+                )
@@ -0,0 +1,235 @@
+# utils/face_index.py
+import numpy as np
+
+
+class BruteForceIndex:
+    """
+    Exact nearest-neighbour index over unit-length embeddings.
+
+    Attributes:
+        embeddings (np.ndarray): Float32 (N, D) matrix of unit rows
+    """
+
+    name = 'brute'
+
+    def __init__(self, embeddings):
+        """Keep a reference to the gallery matrix (no extra memory)"""
+        self.embeddings = embeddings
+
+    def search(self, queries, k=1):
+        """
+        Return the exact top-k neighbours by cosine similarity.
+
+        Args:
+            queries (np.array): Unit-length query embeddings of shape (F, D)
+            k (int): Number of neighbours per query
+
+        Returns:
+            tuple: (indices, scores) arrays of shape (F, k), best first; indices
+                are -1 and scores -inf where fewer than k entries exist
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.embeddings.shape[1])
+        return _top_k(queries @ self.embeddings.T, np.arange(self.embeddings.shape[0]), k)
+
+
+class IVFIndex:
+    """
+    Inverted-file index: embeddings are partitioned by spherical k-means and
+    only the `n_probe` partitions closest to a query are scanned.
+
+    Attributes:
+        embeddings (np.ndarray): Float32 (N, D) matrix of unit rows
+        centroids (np.ndarray): Float32 (n_lists, D) matrix of unit centroids
+        lists (list): Row indices belonging to each partition
+        n_probe (int): Number of partitions scanned per query
+    """
+
+    name = 'ivf'
+
+    def __init__(self, embeddings, n_lists=None, n_probe=8, n_iter=20, seed=0):
+        """
+        Cluster the gallery into partitions.
+
+        Args:
+            embeddings (np.array): Float32 (N, D) matrix of unit rows
+            n_lists (int): Number of partitions (default ~sqrt(N))
+            n_probe (int): Number of partitions scanned per query
+            n_iter (int): K-means iterations
+            seed (int): Random seed for centroid initialisation
+        """
+        self.embeddings = embeddings
+        self.n_probe = n_probe
+        n_rows = embeddings.shape[0]
+        if n_rows == 0:
+            # Empty gallery (e.g. a zone without staff): nothing to cluster
+            self.centroids = np.empty((0, embeddings.shape[1]), dtype=np.float32)
+            self.lists = []
+            return
+        if n_lists is None:
+            n_lists = int(np.sqrt(n_rows))
+        n_lists = max(1, min(n_lists, n_rows))
+
+        self.centroids, assignment = _spherical_kmeans(embeddings, n_lists, n_iter, seed)
+        order = np.argsort(assignment, kind='stable')
+        bounds = np.searchsorted(assignment[order], np.arange(n_lists + 1))
+        self.lists = [order[bounds[i]:bounds[i + 1]] for i in range(n_lists)]
+
+    def search(self, queries, k=1):
+        """
+        Return the approximate top-k neighbours by cosine similarity.
+
+        Args:
+            queries (np.array): Unit-length query embeddings of shape (F, D)
+            k (int): Number of neighbours per query
+
+        Returns:
+            tuple: (indices, scores) arrays of shape (F, k), best first; indices
+                are -1 and scores -inf where fewer than k entries exist
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.embeddings.shape[1])
+        indices = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+        if not self.lists:
+            return indices, scores
+
+        n_probe = min(self.n_probe, len(self.lists))
+        probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :n_probe]
+        for row, query in enumerate(queries):
+            candidates = np.concatenate([self.lists[p] for p in probes[row]])
+            if candidates.size == 0:
+                continue
+            similarity = self.embeddings[candidates] @ query
+            row_indices, row_scores = _top_k(similarity[None, :], candidates, k)
+            indices[row], scores[row] = row_indices[0], row_scores[0]
+
+        return indices, scores
+
+
+class HNSWIndex:
+    """
+    Hierarchical navigable small-world graph index backed by the optional
+    `hnswlib` package.
+
+    Attributes:
+        graph (hnswlib.Index): Underlying graph over inner-product space
+        ef_search (int): Size of the dynamic candidate list at query time
+    """
+
+    name = 'hnsw'
+
+    def __init__(self, embeddings, m=16, ef_construction=200, ef_search=64, num_threads=1):
+        """
+        Build the graph.
+
+        Args:
+            embeddings (np.array): Float32 (N, D) matrix of unit rows
+            m (int): Graph out-degree
+            ef_construction (int): Candidate list size while building
+            ef_search (int): Candidate list size while searching
+            num_threads (int): Threads used to insert items
+        """
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("The 'hnsw' index backend requires hnswlib (pip install hnswlib)") from e
+
+        n_rows, dim = embeddings.shape
+        self.n_rows = n_rows
+        self.ef_search = ef_search
+        self.graph = hnswlib.Index(space='ip', dim=dim)
+        self.graph.init_index(max_elements=max(n_rows, 1), ef_construction=ef_construction, M=m)
+        if n_rows:
+            self.graph.add_items(embeddings, np.arange(n_rows), num_threads=num_threads)
+
+    def search(self, queries, k=1):
+        """
+        Return the approximate top-k neighbours by cosine similarity.
+
+        Args:
+            queries (np.array): Unit-length query embeddings of shape (F, D)
+            k (int): Number of neighbours per query
+
+        Returns:
+            tuple: (indices, scores) arrays of shape (F, k), best first
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.graph.dim)
+        indices = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+        found = min(k, self.n_rows)
+        if found == 0:
+            return indices, scores
+
+        self.graph.set_ef(max(self.ef_search, found))
+        labels, distances = self.graph.knn_query(queries, k=found)
+        indices[:, :found] = labels
+        scores[:, :found] = 1.0 - distances  # hnswlib 'ip' distance is 1 - dot
+        return indices, scores
+
+
+INDEX_BACKENDS = {
+    BruteForceIndex.name: BruteForceIndex,
+    IVFIndex.name: IVFIndex,
+    HNSWIndex.name: HNSWIndex,
+}
+
+
+def build_index(backend, embeddings, **params):
+    """
+    Build a nearest-neighbour index by backend name.
+
+    Args:
+        backend (str): One of 'brute', 'ivf' or 'hnsw'
+        embeddings (np.array): Float32 (N, D) matrix of unit rows
+        **params: Backend-specific parameters (e.g. n_probe, ef_search)
+
+    Returns:
+        object: Index exposing search(queries, k) -> (indices, scores)
+    """
+    if backend not in INDEX_BACKENDS:
+        raise ValueError(f"Unknown index backend '{backend}', expected one of {sorted(INDEX_BACKENDS)}")
+    return INDEX_BACKENDS[backend](embeddings, **params)
+
+
+def _top_k(similarity, columns, k):
+    """Select the k best columns of each similarity row, padding with -1/-inf"""
+    n_queries, n_columns = similarity.shape
+    indices = np.full((n_queries, k), -1, dtype=np.int64)
+    scores = np.full((n_queries, k), -np.inf, dtype=np.float32)
+    found = min(k, n_columns)
+    if found == 0:
+        return indices, scores
+
+    if found < n_columns:
+        top = np.argpartition(-similarity, found - 1, axis=1)[:, :found]
+    else:
+        top = np.broadcast_to(np.arange(n_columns), (n_queries, n_columns))
+    top_scores = np.take_along_axis(similarity, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+
+    indices[:, :found] = columns[np.take_along_axis(top, order, axis=1)]
+    scores[:, :found] = np.take_along_axis(top_scores, order, axis=1)
+    return indices, scores
+
+
+def _spherical_kmeans(embeddings, n_clusters, n_iter, seed):
+    """Cluster unit vectors by cosine similarity; returns (centroids, assignment)"""
+    rng = np.random.default_rng(seed)
+    n_rows = embeddings.shape[0]
+    centroids = embeddings[rng.choice(n_rows, size=n_clusters, replace=False)].copy()
+    assignment = np.zeros(n_rows, dtype=np.int64)
+
+    for _ in range(n_iter):
+        assignment = np.argmax(embeddings @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, embeddings)
+        norms = np.linalg.norm(sums, axis=1)
+
+        # Re-seed empty clusters from random rows
+        empty = norms == 0
+        if empty.any():
+            sums[empty] = embeddings[rng.choice(n_rows, size=int(empty.sum()))]
+            norms[empty] = np.linalg.norm(sums[empty], axis=1)
+        centroids = (sums / norms[:, None]).astype(np.float32)
+
+    assignment = np.argmax(embeddings @ centroids.T, axis=1)
+    return centroids, assignment
@@ -0,0 +1,96 @@
+# utils/pagination.py
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def page_size_control(key, default=50):
+    """
+    Rows-per-page selector for a paginated table.
+
+    Args:
+        key (str): Table key, shared with cursor_pager
+        default (int): Initial page size (one of PAGE_SIZES)
+
+    Returns:
+        int: Selected page size
+    """
+    return st.selectbox('Rows per page', PAGE_SIZES, index=PAGE_SIZES.index(default),
+                        key=f'{key}_page_size', on_change=reset_pages, args=(key,))
+
+
+def reset_pages(key):
+    """Return a paginated table to its first page"""
+    st.session_state[f'{key}_cursors'] = [None]
+
+
+def cursor_pager(key, fetch, page_size, filters=None):
+    """
+    Render Previous/Next controls and return the rows of the current page.
+
+    The cursors of the visited pages are kept in session state, so moving
+    forward and back only ever fetches one page. Changing `filters` returns
+    to the first page.
+
+    Args:
+        key (str): Table key, unique on the page
+        fetch (callable): fetch(cursor, page_size) -> (rows, next_cursor), where
+            cursor is None for the first page and next_cursor is None on the last
+        page_size (int): Rows per page
+        filters: Any comparable value describing the active filters
+
+    Returns:
+        The rows returned by fetch for the current page
+    """
+    if st.session_state.get(f'{key}_filters') != filters:
+        st.session_state[f'{key}_filters'] = filters
+        reset_pages(key)
+    cursors = st.session_state.setdefault(f'{key}_cursors', [None])
+
+    rows, next_cursor = fetch(cursors[-1], page_size)
+
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button('◀ Previous', key=f'{key}_previous', disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col_page:
+        st.caption(f"Page {len(cursors)}")
+    with col_next:
+        if st.button('Next ▶', key=f'{key}_next', disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+
+    return rows
+
+
+def frame_pager(key, df, page_size, filters=None):
+    """
+    cursor_pager over an in-memory DataFrame, using row offsets as cursors.
+
+    Returns:
+        pd.DataFrame: The rows of the current page
+    """
+    def fetch(cursor, size):
+        offset = cursor or 0
+        return df.iloc[offset:offset + size], offset + size if offset + size < len(df) else None
+
+    return cursor_pager(key, fetch, page_size, filters=filters)
+
+
+def format_datetime_columns(df, columns, fmt='%Y-%m-%d %H:%M:%S'):
+    """
+    Format datetime columns as strings with one vectorized strftime per column.
+
+    Args:
+        df (pd.DataFrame): Rows to display (typically a single page)
+        columns (list): Datetime columns to format
+        fmt (str): strftime format
+
+    Returns:
+        pd.DataFrame: Copy of df with the columns formatted
+    """
+    df = df.copy()
+    for column in columns:
+        df[column] = df[column].dt.strftime(fmt)
+    return df
@@ -0,0 +1,129 @@
+# utils/redis_store.py
+import threading
+
+import redis
+
+from utils.config import get_setting
+
+# The client is created on first use, once per process, so pages that never
+# touch Redis import fast; scripts are registered once per process as well
+_redis_client = None
+_redis_lock = threading.Lock()
+_scripts = {}
+
+
+def get_redis():
+    """
+    Return the process-wide Redis client, creating its connection pool on first use.
+    
+    Settings (secrets or environment):
+        REDIS_HOST, REDIS_PORT, REDIS_PASSWORD: Server address and credentials
+        REDIS_MAX_CONNECTIONS (int): Pool size shared by all sessions (default 50)
+        REDIS_POOL_TIMEOUT (float): Seconds to wait for a free connection (default 5)
+        REDIS_SOCKET_TIMEOUT (float): Read/write timeout in seconds (default 5)
+        REDIS_CONNECT_TIMEOUT (float): Connect timeout in seconds (default 5)
+        REDIS_HEALTH_CHECK_INTERVAL (int): Seconds between idle connection checks (default 30)
+    
+    Returns:
+        redis.StrictRedis: Client backed by a shared blocking connection pool
+    """
+    global _redis_client
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                pool = redis.BlockingConnectionPool(
+                    host=get_setting('REDIS_HOST'),
+                    port=get_setting('REDIS_PORT', 6379, int),
+                    password=get_setting('REDIS_PASSWORD'),
+                    max_connections=get_setting('REDIS_MAX_CONNECTIONS', 50, int),
+                    timeout=get_setting('REDIS_POOL_TIMEOUT', 5.0, float),
+                    socket_timeout=get_setting('REDIS_SOCKET_TIMEOUT', 5.0, float),
+                    socket_connect_timeout=get_setting('REDIS_CONNECT_TIMEOUT', 5.0, float),
+                    socket_keepalive=True,
+                    health_check_interval=get_setting('REDIS_HEALTH_CHECK_INTERVAL', 30, int)
+                )
+                _redis_client = redis.StrictRedis(connection_pool=pool)
+    return _redis_client
+
+
+def scan_keys(pattern, count=1000):
+    """
+    List keys matching a pattern with SCAN (non-blocking for the server).
+    
+    Args:
+        pattern (str): Glob pattern, e.g. 'duty_report:*'
+        count (int): SCAN batch size hint
+        
+    Returns:
+        list: Matching keys (bytes)
+    """
+    return list(get_redis().scan_iter(match=pattern, count=count))
+
+
+def hgetall_many(keys, chunk_size=500):
+    """
+    Fetch several hashes in pipelined batches.
+    
+    Args:
+        keys (list): Hash keys
+        chunk_size (int): Keys per pipeline round trip
+        
+    Returns:
+        list: One dict (bytes -> bytes) per key, in order
+    """
+    results = []
+    for start in range(0, len(keys), chunk_size):
+        pipe = get_redis().pipeline(transaction=False)
+        for key in keys[start:start + chunk_size]:
+            pipe.hgetall(key)
+        results.extend(pipe.execute())
+    return results
+
+
+def hmget_many(keys, *fields, chunk_size=500):
+    """
+    Read the same fields of many hashes with pipelined HMGETs.
+    
+    Args:
+        keys (list): Hash keys
+        fields (str): Field names to read
+        chunk_size (int): Keys per pipeline round trip
+        
+    Returns:
+        list: One list of field values (None when missing) per key, in order
+    """
+    results = []
+    for start in range(0, len(keys), chunk_size):
+        pipe = get_redis().pipeline(transaction=False)
+        for key in keys[start:start + chunk_size]:
+            pipe.hmget(key, *fields)
+        results.extend(pipe.execute())
+    return results
+
+
+def delete_keys(keys, chunk_size=500):
+    """
+    Delete keys in batches with UNLINK (memory is reclaimed in the background).
+    
+    Args:
+        keys (list): Keys to delete
+        chunk_size (int): Keys per command
+        
+    Returns:
+        int: Number of keys removed
+    """
+    removed = 0
+    pipe = get_redis().pipeline(transaction=False)
+    for start in range(0, len(keys), chunk_size):
+        pipe.unlink(*keys[start:start + chunk_size])
+    for count in pipe.execute():
+        removed += count
+    return removed
+
+
+def run_script(source, keys, args, client=None):
+    """Run a Lua script (optionally queued on a pipeline), registering it on first use"""
+    script = _scripts.get(source)
+    if script is None:
+        script = _scripts.setdefault(source, get_redis().register_script(source))
+    return script(keys=keys, args=args, client=client)
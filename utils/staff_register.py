@@ -0,0 +1,61 @@
+# utils/staff_register.py
+import numpy as np
+import pandas as pd
+
+DEFAULT_ZONE = 'Lagos Zone 2'
+EMBEDDING_DIM = 512
+
+
+def parse_staff_register(records, dim=EMBEDDING_DIM):
+    """
+    Parse raw staff register entries into labels and one embedding matrix.
+
+    Keys are split with vectorized string operations and all embedding blobs
+    are decoded with a single np.frombuffer over the joined buffer.
+
+    Args:
+        records (dict): Mapping of staff key ('file.first.last@role@zone', bytes or str)
+            -> float32 embedding bytes, as returned by HGETALL
+        dim (int): Expected embedding dimension
+
+    Returns:
+        tuple: (labels_df, embeddings, malformed) where
+            - labels_df: DataFrame with columns ID_Name_Role, File No. Name, Role, Zone
+            - embeddings: float32 array of shape (len(labels_df), dim), row-aligned with labels_df
+            - malformed: list of {'key': ..., 'reason': ...} for skipped entries
+    """
+    columns = ['ID_Name_Role', 'File No. Name', 'Role', 'Zone']
+    if not records:
+        return pd.DataFrame(columns=columns), np.empty((0, dim), dtype=np.float32), []
+
+    keys = pd.Series(list(records.keys()), dtype=object)
+    if isinstance(keys.iloc[0], bytes):
+        keys = keys.str.decode('utf-8', errors='replace')
+    values = list(records.values())
+
+    # file.name part must contain a '.', role and zone are optional
+    parts = keys.str.split('@', n=2, expand=True).reindex(columns=[0, 1, 2])
+    file_name = parts[0].str.extract(r'^([^.]+)\.(.+)$')
+
+    sizes = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+    bad_key = file_name[0].isna().to_numpy()
+    bad_blob = sizes != dim * 4
+    valid = ~(bad_key | bad_blob)
+
+    malformed = [
+        {'key': key, 'reason': 'key is not in file.first.last@role@zone format' if key_error
+                               else f'embedding has {size // 4} floats, expected {dim}'}
+        for key, key_error, size in zip(keys[~valid], bad_key[~valid], sizes[~valid])
+    ]
+
+    labels_df = pd.DataFrame({
+        'ID_Name_Role': keys[valid].to_numpy(),
+        'File No. Name': (file_name[0] + '.' + file_name[1])[valid].to_numpy(),
+        'Role': parts[1].fillna('')[valid].to_numpy(),
+        'Zone': parts[2].fillna(DEFAULT_ZONE)[valid].to_numpy(),
+    })
+
+    valid_values = [value for value, ok in zip(values, valid) if ok]
+    embeddings = np.frombuffer(b''.join(valid_values), dtype=np.float32).reshape(-1, dim)
+
+    return labels_df, embeddings, malformed
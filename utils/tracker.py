@@ -0,0 +1,111 @@
+# utils/tracker.py
+import numpy as np
+
+
+class Track:
+    """
+    A face followed across frames, with its cached identity.
+
+    Attributes:
+        track_id (int): Unique id within the tracker
+        bbox (np.ndarray): Last box as [x1, y1, x2, y2]
+        missed (int): Consecutive frames without a matching detection
+        name (str): Cached recognised name (None until first recognition)
+        role (str): Cached recognised role
+        zone (str): Cached zone of the recognised staff member
+        score (float): Similarity score of the cached identity
+        recognised_at (int): Frame index of the last recognition
+    """
+
+    def __init__(self, track_id, bbox):
+        self.track_id = track_id
+        self.bbox = np.asarray(bbox, dtype=np.float32)
+        self.missed = 0
+        self.name = None
+        self.role = None
+        self.zone = None
+        self.score = 0.0
+        self.recognised_at = -1
+
+    def needs_recognition(self, frame_index, recognise_every):
+        """True for new tracks and for tracks not recognised in the last `recognise_every` frames"""
+        return self.name is None or frame_index - self.recognised_at >= recognise_every
+
+
+class IoUTracker:
+    """
+    Minimal multi-face tracker associating detector boxes by IoU.
+
+    Attributes:
+        iou_threshold (float): Minimum IoU for a detection to continue a track
+        max_missed (int): Frames a track survives without detections
+        tracks (list): Live tracks
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missed=10):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.tracks = []
+        self._next_id = 0
+
+    def update(self, boxes):
+        """
+        Associate this frame's detections with live tracks.
+
+        Matching is greedy by descending IoU. Unmatched detections start new
+        tracks; tracks unmatched for more than `max_missed` frames are dropped.
+
+        Args:
+            boxes (list): Detector boxes as [x1, y1, x2, y2, ...]
+
+        Returns:
+            list: The Track for each box, in the same order as `boxes`
+        """
+        boxes = np.asarray([box[:4] for box in boxes], dtype=np.float32).reshape(-1, 4)
+        assigned = [None] * len(boxes)
+        matched_tracks = set()
+
+        if self.tracks and len(boxes):
+            overlaps = iou_matrix(np.stack([track.bbox for track in self.tracks]), boxes)
+            for flat in np.argsort(-overlaps, axis=None):
+                t, d = np.unravel_index(flat, overlaps.shape)
+                if overlaps[t, d] < self.iou_threshold:
+                    break
+                if t in matched_tracks or assigned[d] is not None:
+                    continue
+                track = self.tracks[t]
+                track.bbox = boxes[d]
+                track.missed = 0
+                assigned[d] = track
+                matched_tracks.add(t)
+
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.missed += 1
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+
+        for d, box in enumerate(boxes):
+            if assigned[d] is None:
+                assigned[d] = Track(self._next_id, box)
+                self._next_id += 1
+                self.tracks.append(assigned[d])
+
+        return assigned
+
+    def visible(self):
+        """Tracks matched in the most recent update"""
+        return [track for track in self.tracks if track.missed == 0]
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU between boxes a (M, 4) and b (N, 4) in [x1, y1, x2, y2] format"""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)